@@ -0,0 +1,68 @@
+"""Per-row scoring latency of the compiled path against the sklearn pipeline.
+
+Usage: python benchmarks/bench_fast_inference.py [--sizes 1 10 100 10000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+from bench_ingestion import make_extract  # noqa: E402
+from fast_inference import get_compiled_scorer  # noqa: E402
+from utils import score_probabilities  # noqa: E402
+
+
+def per_call(func, data, min_seconds):
+    """Best-of timing per call, repeating until ``min_seconds`` have passed"""
+    timings = []
+    deadline = time.perf_counter() + min_seconds
+    while len(timings) < 3 or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        func(data)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 10_000])
+    parser.add_argument("--seconds", type=float, default=1.0, help="per measurement")
+    args = parser.parse_args()
+
+    compiled = get_compiled_scorer()
+    employees = make_extract(max(args.sizes)).drop(columns=["manager_notes"])
+    print(
+        f"{'rows':>7}  {'sklearn':>12}  {'compiled':>12}  {'dict input':>12}  speedup"
+    )
+    for size in args.sizes:
+        df = employees.head(size)
+        columns = {column: df[column].to_numpy() for column in df.columns}
+        expected = score_probabilities(df)
+        if not (
+            np.array_equal(compiled.score(df), expected)
+            and np.array_equal(compiled.score(columns), expected)
+        ):
+            raise AssertionError(f"Compiled scores differ from sklearn at {size} rows")
+
+        timings = [
+            per_call(score, data, args.seconds) / size * 1e6
+            for score, data in (
+                (score_probabilities, df),
+                (compiled.score, df),
+                (compiled.score, columns),
+            )
+        ]
+        print(
+            f"{size:>7,}  "
+            + "  ".join(f"{timing:>9.1f} us" for timing in timings)
+            + f"  {timings[0] / timings[1]:6.1f}x"
+        )
+    print("Times are per row; scores are identical at every size.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Compare the FeatureEngineer transform against the previous implementation.
+
+Usage: python benchmarks/bench_feature_engineer.py [--rows 1000000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+from preprocessing_pipeline import FeatureEngineer  # noqa: E402
+from synthetic_data import make_employees  # noqa: E402
+
+
+def legacy_transform(X):
+    """FeatureEngineer.transform as it was before the vectorized rewrite"""
+    X_ = X.copy()
+    X_["hire_date"] = pd.to_datetime(X_["hire_date"], errors="coerce")
+    X_["last_promotion_date"] = pd.to_datetime(
+        X_["last_promotion_date"], errors="coerce"
+    )
+    X_["years_since_last_promotion"] = (
+        pd.to_datetime("today") - X_["last_promotion_date"]
+    ).dt.days / 365
+    X_["employment_age"] = (pd.to_datetime("today") - X_["hire_date"]).dt.days / 365
+    return X_.drop(columns=["hire_date", "last_promotion_date"])
+
+
+def best_of(func, X, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(X)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    X = make_employees(args.rows)
+    engineer = FeatureEngineer(reference_date=pd.Timestamp("today"))
+    pd.testing.assert_frame_equal(
+        engineer.transform(X), legacy_transform(X), check_like=True
+    )
+
+    legacy = best_of(legacy_transform, X, args.repeat)
+    current = best_of(engineer.transform, X, args.repeat)
+    print(f"rows:     {args.rows:,}")
+    print(f"legacy:   {legacy:.3f}s")
+    print(f"current:  {current:.3f}s")
+    print(f"speedup:  {legacy / current:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Compare load times of an employee extract stored as CSV, Parquet and Arrow.
+
+Usage: python benchmarks/bench_ingestion.py [--rows 1000000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from functools import partial
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+from storage_logic import read_dataset  # noqa: E402
+from synthetic_data import make_employees  # noqa: E402
+
+
+def make_extract(rows, seed=0):
+    """Synthetic HR extract with every model input plus unused free text"""
+    rng = np.random.default_rng(seed)
+    # Extracts carry columns the model never uses
+    return make_employees(rows, seed=seed).assign(
+        manager_notes=rng.choice(
+            ["Strong performer", "Needs coaching", "Relocating soon", ""], rows
+        )
+    )
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_extract(args.rows)
+    with tempfile.TemporaryDirectory() as directory:
+        paths = {
+            "csv": os.path.join(directory, "employees.csv"),
+            "parquet": os.path.join(directory, "employees.parquet"),
+            "arrow": os.path.join(directory, "employees.arrow"),
+        }
+        df.to_csv(paths["csv"], index=False)
+        df.to_parquet(paths["parquet"], index=False)
+        feather.write_feather(
+            pa.Table.from_pandas(df, preserve_index=False), paths["arrow"]
+        )
+
+        cases = [("pd.read_csv (previous)", "csv", lambda: pd.read_csv(paths["csv"]))]
+        cases += [
+            (f"read_dataset {name}", name, partial(read_dataset, path, name))
+            for name, path in paths.items()
+        ]
+        print(f"rows: {args.rows:,}")
+        baseline = None
+        for label, file_format, load in cases:
+            elapsed = best_of(load, args.repeat)
+            baseline = baseline or elapsed
+            size = os.path.getsize(paths[file_format]) / 1024**2
+            print(
+                f"{label:<24} {elapsed:7.3f}s  {baseline / elapsed:5.2f}x"
+                f"  ({size:,.0f} MB on disk)"
+            )
+
+
+if __name__ == "__main__":
+    main()
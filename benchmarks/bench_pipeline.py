@@ -0,0 +1,301 @@
+"""Time and memory of every dashboard stage on synthetic extracts of each size.
+
+Each size is written to CSV and Parquet with synthetic_data.py and then
+run through the stages the app runs: ingest, feature engineering, the
+column transform, predict, feature attribution, risk labeling, the
+dashboard aggregations and parsing of LLM responses. Results are saved as
+JSON; pass a previous results file as --baseline to compare against it.
+
+Usage:
+    python benchmarks/bench_pipeline.py --sizes 1k 100k 1M --output results.json
+    python benchmarks/bench_pipeline.py --sizes 1k 100k 1M --baseline results.json
+"""
+
+import argparse
+import ctypes
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+from synthetic_data import write_employees  # noqa: E402
+from batch_scoring import peak_rss_mb  # noqa: E402
+from chart_data import compute_engagement_chart_data  # noqa: E402
+from dashboard_metrics import compute_dashboard_summary  # noqa: E402
+from feature_attribution import get_explainer  # noqa: E402
+from llm import parse_insights  # noqa: E402
+from llm_stub_server import STUB_COMPLETION  # noqa: E402
+from storage_logic import read_dataset  # noqa: E402
+from utils import add_risk_columns, get_model, get_preprocessor  # noqa: E402
+
+SIZE_SUFFIXES = {"k": 1_000, "m": 1_000_000}
+# Completions parsed per size; parsing runs once per explained employee,
+# not per row of the extract, so this does not grow past the cap
+LLM_RESPONSES = 1_000
+# Seconds between resident memory samples while a stage runs
+MEMORY_SAMPLE_INTERVAL = 0.005
+# Slowdowns smaller than this are never reported as regressions
+NOISE_FLOOR_SECONDS = 0.005
+
+
+def parse_size(text):
+    """Row count from "5000", "100k" or "10M" """
+    suffix = text[-1].lower()
+    if suffix in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[suffix])
+    return int(text)
+
+
+def release_free_memory():
+    """Hand freed heap back to the OS, so RSS only counts live memory"""
+    gc.collect()
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def rss_mb():
+    """Resident memory of this process in MB, or None off Linux"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024**2
+    except OSError:
+        return None
+
+
+class MemoryPeak:
+    """Highest resident memory above the starting level while in the block.
+
+    A background thread samples RSS, which counts NumPy and Arrow buffers
+    that tracemalloc would miss, at little cost to the timed code. Arrow
+    keeps freed buffers in its own pool, so a read that follows another
+    read can report less than it allocates.
+    """
+
+    def __init__(self, interval=MEMORY_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.start = self.peak = self.end = None
+        self._done = threading.Event()
+
+    def _sample(self):
+        while not self._done.wait(self.interval):
+            self.peak = max(self.peak, rss_mb())
+
+    def __enter__(self):
+        release_free_memory()
+        self.start = self.peak = rss_mb()
+        if self.start is not None:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self.start is None:
+            return
+        self._done.set()
+        self._thread.join()
+        self.end = rss_mb()
+        self.peak = max(self.peak, self.end)
+
+    def report(self):
+        if self.start is None:
+            return {"peak_mb": None, "retained_mb": None}
+        return {
+            "peak_mb": round(self.peak - self.start, 1),
+            "retained_mb": round(self.end - self.start, 1),
+        }
+
+
+def measure(func, rows, repeat):
+    """Best-of-``repeat`` time and the memory of the first run of ``func()``"""
+    timings = []
+    for run in range(repeat):
+        if run == 0:
+            with MemoryPeak() as memory:
+                start = time.perf_counter()
+                result = func()
+                timings.append(time.perf_counter() - start)
+        else:
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+    seconds = min(timings)
+    return result, {
+        "seconds": round(seconds, 6),
+        "rows_per_sec": round(rows / seconds) if seconds else None,
+        **memory.report(),
+    }
+
+
+def llm_responses(count):
+    """Completions as the model returns them, alternating header styles"""
+    bold = STUB_COMPLETION.replace("### ", "**").replace("\n", "**\n", 1)
+    return [STUB_COMPLETION if i % 2 else bold for i in range(count)]
+
+
+def run_size(rows, directory, repeat):
+    """Results of every stage on an extract of ``rows`` employees"""
+    paths = {
+        file_format: write_employees(
+            os.path.join(directory, f"employees_{rows}.{file_format}"), rows
+        )
+        for file_format in ("csv", "parquet")
+    }
+    preprocessor, model = get_preprocessor(), get_model()
+    engineer = preprocessor.named_steps["feature_engineering"]
+    transform = preprocessor.named_steps["transform"]
+    explainer = get_explainer()
+    responses = llm_responses(min(rows, LLM_RESPONSES))
+
+    stages = {}
+    _, stages["ingest_csv"] = measure(
+        lambda: read_dataset(paths["csv"], "csv"), rows, repeat
+    )
+    df, stages["ingest_parquet"] = measure(
+        lambda: read_dataset(paths["parquet"], "parquet"), rows, repeat
+    )
+    engineered, stages["feature_engineering"] = measure(
+        lambda: engineer.transform(df), rows, repeat
+    )
+    X, stages["transform"] = measure(
+        lambda: transform.transform(engineered), rows, repeat
+    )
+    probs, stages["predict"] = measure(
+        lambda: model.predict_proba(X)[:, 1], rows, repeat
+    )
+    _, stages["attribution"] = measure(lambda: explainer.explain(df), rows, repeat)
+    pred_df, stages["labeling"] = measure(
+        lambda: add_risk_columns(df, probs), rows, repeat
+    )
+    _, stages["dashboard_summary"] = measure(
+        lambda: compute_dashboard_summary(pred_df), rows, repeat
+    )
+    _, stages["engagement_chart"] = measure(
+        lambda: compute_engagement_chart_data(pred_df), rows, repeat
+    )
+    _, stages["llm_parsing"] = measure(
+        lambda: [parse_insights(text) for text in responses], len(responses), repeat
+    )
+    stages["llm_parsing"]["responses"] = len(responses)
+    for path in paths.values():
+        os.remove(path)
+    return stages
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print each stage against ``baseline``; returns the regressed stages.
+
+    A stage regresses when it is more than ``threshold`` slower and also
+    slower by more than NOISE_FLOOR_SECONDS, which keeps millisecond-long
+    stages from flagging on timer noise.
+    """
+    regressions = []
+    print(
+        f"\n{'rows':>10}  {'stage':<20} {'baseline':>10} {'now':>10}  {'change':>7}"
+        f"  {'peak MB':>15}"
+    )
+    for size, stages in results["sizes"].items():
+        for stage, now in stages.items():
+            before = baseline["sizes"].get(size, {}).get(stage)
+            if before is None:
+                continue
+            change = now["seconds"] / before["seconds"] - 1 if before["seconds"] else 0
+            flag = ""
+            if (
+                change > threshold
+                and now["seconds"] - before["seconds"] > NOISE_FLOOR_SECONDS
+            ):
+                flag = "  REGRESSION"
+                regressions.append((size, stage))
+            memory = (
+                f"{before['peak_mb']:>7,.0f} {now['peak_mb']:>7,.0f}"
+                if before.get("peak_mb") is not None and now["peak_mb"] is not None
+                else f"{'-':>15}"
+            )
+            print(
+                f"{int(size):>10,}  {stage:<20} {before['seconds']:>9.4f}s"
+                f" {now['seconds']:>9.4f}s  {change:+7.1%}  {memory}{flag}"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", default=["1k", "100k", "1M"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="slowdown over the baseline reported as a regression (default 0.10)",
+    )
+    args = parser.parse_args()
+
+    results = {"environment": environment(), "sizes": {}}
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in map(parse_size, args.sizes):
+            stages = run_size(rows, directory, args.repeat)
+            results["sizes"][str(rows)] = stages
+            print(f"\n{rows:,} rows")
+            for stage, result in stages.items():
+                peak = result["peak_mb"]
+                print(
+                    f"  {stage:<20} {result['seconds']:>9.4f}s"
+                    f"  {result['rows_per_sec'] or 0:>12,} rows/s"
+                    + (f"  peak +{peak:,.0f} MB" if peak is not None else "")
+                )
+    # None where the platform has no resource module (Windows)
+    peak, _ = peak_rss_mb()
+    results["environment"]["peak_rss_mb"] = None if peak is None else round(peak, 1)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} stage(s) slower than the baseline")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Report cold-start import and artifact load times in a fresh interpreter.
+
+Usage: python benchmarks/bench_startup.py [--runs 3]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+# Runs in a fresh interpreter so nothing is already imported or loaded
+PROBE = """
+import json, sys, time
+sys.path.insert(0, sys.argv[1])
+start = time.perf_counter()
+import utils, llm, storage_logic, prediction_cache
+imports = time.perf_counter() - start
+utils.get_preprocessor()
+utils.get_model()
+print(json.dumps({"imports": imports, **utils.startup_report()}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    runs = []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE, SRC_DIR],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    for name in runs[0]:
+        best = min(run[name] for run in runs)
+        print(f"{name:<20} {best:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Load-test the scoring service with concurrent single-employee requests.
+
+Starts the service in this process unless --url points at a running one.
+
+Usage: python benchmarks/load_test_scoring.py [--clients 32] [--requests 5000]
+       python benchmarks/load_test_scoring.py --max-batch-rows 1   # no batching
+"""
+
+import argparse
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+from scoring_service import serve  # noqa: E402
+from synthetic_data import make_employees  # noqa: E402
+
+
+def employee_payloads(count):
+    df = make_employees(count)
+    # JSON has no NaN; missing values are sent as null
+    return [
+        json.dumps(record).encode()
+        for record in df.astype(object).where(df.notna(), None).to_dict("records")
+    ]
+
+
+def run_client(host, port, payloads, latencies, errors):
+    connection = http.client.HTTPConnection(host, port)
+    for payload in payloads:
+        start = time.perf_counter()
+        connection.request(
+            "POST", "/score", payload, {"Content-Type": "application/json"}
+        )
+        response = connection.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        errors.append(response.status != 200)
+    connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="running service, e.g. http://127.0.0.1:8090")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--max-batch-rows", type=int)
+    parser.add_argument("--max-wait-ms", type=float)
+    args = parser.parse_args()
+
+    if args.url:
+        host, port = urlsplit(args.url).hostname, urlsplit(args.url).port
+    else:
+        server = serve(
+            port=0, max_batch_rows=args.max_batch_rows, max_wait_ms=args.max_wait_ms
+        )
+        host, port = server.server_address
+
+    payloads = employee_payloads(args.requests)
+    latencies, errors = [], []
+    threads = [
+        threading.Thread(
+            target=run_client,
+            args=(host, port, payloads[i :: args.clients], latencies, errors),
+        )
+        for i in range(args.clients)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    connection = http.client.HTTPConnection(host, port)
+    connection.request("GET", "/metrics")
+    metrics = json.loads(connection.getresponse().read())
+
+    latencies = np.array(latencies) * 1000
+    print(f"requests:    {len(latencies):,} from {args.clients} clients")
+    print(f"errors:      {sum(errors)}")
+    print(f"throughput:  {len(latencies) / elapsed:,.0f} requests/sec")
+    print(
+        f"latency:     p50 {np.percentile(latencies, 50):.1f} ms, "
+        f"p99 {np.percentile(latencies, 99):.1f} ms (client side)"
+    )
+    print(f"batches:     {metrics['batches']:,}")
+    print(f"batch sizes: {metrics['batch_sizes']}")
+    print(f"server:      {metrics['latency']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Synthetic employee extracts in the schema the preprocessing pipeline expects.
+
+Rows are generated in chunks, so files of millions of rows can be written
+without holding the whole extract in memory.
+
+Usage: python benchmarks/synthetic_data.py 1000000 employees.parquet
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+from preprocessing_pipeline import (  # noqa: E402
+    CATEGORICAL_FEATURES,
+    DATE_COLUMNS,
+    INPUT_COLUMNS,
+    RAW_NUMERICAL_FEATURES,
+)
+
+DEPARTMENTS = [
+    "Business Solution",
+    "Customer Success",
+    "Datazone",
+    "Finance",
+    "GRCS",
+    "HR",
+    "Marketing and Communications",
+    "PMO",
+    "Product Engineering",
+    "Sales",
+    "TSS",
+]
+# (low, high, decimals) of each raw numeric feature, as in the HR extracts
+NUMERIC_RANGES = {
+    "salary": (30_000, 150_000, 0),
+    "tenure": (0, 10, 0),
+    "engagement_score": (1, 5, 1),
+    "working_hours_per_month": (120, 220, 0),
+    "kpi_score": (0, 60, 1),
+    "work_life_balance_score": (1, 6, 0),
+    "overtime_hours": (0, 15, 0),
+    "job_satisfaction": (1, 6, 0),
+    "number_of_projects": (1, 7, 0),
+    "distance_from_home": (1, 50, 0),
+    "trainings_and_certifications": (0, 7, 0),
+}
+# Share of missing values, which the preprocessor imputes
+MISSING_RATES = {"salary": 0.02, "last_promotion_date": 0.02}
+DEFAULT_CHUNK_ROWS = 1_000_000
+FILE_FORMATS = ("csv", "parquet")
+
+
+def _dates(rng, start, days, rows):
+    offsets = rng.integers(0, days, rows).astype("timedelta64[D]")
+    return np.datetime64(start, "D") + offsets
+
+
+def make_employees(rows, seed=0, first_id=1000):
+    """One DataFrame of ``rows`` synthetic employees: EmployeeID + INPUT_COLUMNS"""
+    if set(NUMERIC_RANGES) != set(RAW_NUMERICAL_FEATURES) or CATEGORICAL_FEATURES != [
+        "department"
+    ]:
+        raise ValueError("Generator is out of date with the pipeline's input columns")
+    rng = np.random.default_rng(seed)
+    columns = {
+        "EmployeeID": np.arange(first_id, first_id + rows),
+        "department": rng.choice(DEPARTMENTS, rows).astype(object),
+    }
+    for column, (low, high, decimals) in NUMERIC_RANGES.items():
+        if decimals:
+            values = rng.uniform(low, high, rows).round(decimals)
+        else:
+            values = rng.integers(low, high, rows).astype(np.float64)
+        columns[column] = values
+
+    hire = _dates(rng, "2015-01-01", 3500, rows)
+    promotion = np.maximum(hire, _dates(rng, "2019-01-01", 2000, rows))
+    for column, dates in zip(DATE_COLUMNS, (hire, promotion)):
+        columns[column] = np.datetime_as_string(dates, unit="D").astype(object)
+
+    df = pd.DataFrame(columns)
+    for column, rate in MISSING_RATES.items():
+        df.loc[rng.random(rows) < rate, column] = (
+            np.nan if column in NUMERIC_RANGES else None
+        )
+    return df[["EmployeeID", *INPUT_COLUMNS]]
+
+
+def iter_employees(rows, chunk_rows=DEFAULT_CHUNK_ROWS, seed=0):
+    """``rows`` synthetic employees as DataFrames of up to ``chunk_rows``"""
+    for number, start in enumerate(range(0, rows, chunk_rows)):
+        yield make_employees(
+            min(chunk_rows, rows - start), seed=seed + number, first_id=1000 + start
+        )
+
+
+def write_employees(path, rows, file_format=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Write ``rows`` synthetic employees to a CSV or Parquet file"""
+    file_format = file_format or os.path.splitext(path)[1].lstrip(".")
+    if file_format not in FILE_FORMATS:
+        raise ValueError(f"Unsupported format {file_format!r}")
+    writer = None
+    try:
+        for chunk in iter_employees(rows, chunk_rows):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = (
+                    pa_csv.CSVWriter(path, table.schema)
+                    if file_format == "csv"
+                    else pq.ParquetWriter(path, table.schema)
+                )
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("rows", type=int)
+    parser.add_argument("output", help="path ending in .csv or .parquet")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args()
+    write_employees(args.output, args.rows, chunk_rows=args.chunk_rows)
+    print(f"Wrote {args.rows:,} employees to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
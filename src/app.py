@@ -1,14 +1,49 @@
+import time
+
+_import_start = time.perf_counter()
+
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import pandas as pd
 import plotly.express as px
-from auth import login
-from utils import predict_attrition
-from llm import generate_insights
+from auth import is_admin, login
+from instrumentation import instrumentation, instrumented
+from utils import (
+    RISK_LABELS,
+    STARTUP_TIMINGS,
+    is_high_risk,
+    startup_report,
+    warm_up_in_background,
+)
+from prediction_cache import cached_predict_attrition
+from dashboard_metrics import cached_dashboard_summary
+from chart_data import cached_engagement_chart_data
+from explorer import PAGE_SIZES, get_explorer_index
+from feature_attribution import get_attributions
+from prediction_store import (
+    record_session_report,
+    session_memory_report,
+    session_predictions,
+    session_reports,
+)
+from llm import (
+    format_drivers,
+    generate_insights_batch,
+    get_client,
+    stream_insights,
+)
+from insight_cache import get_insight_cache
+from report_export import REPORT_FORMATS, build_report, report_file_name
 from storage_logic import load_data
 import sys
 import os
 
 sys.path.append(os.path.dirname(__file__))
+# Modules are cached after the first run, so only the cold import is recorded
+STARTUP_TIMINGS.setdefault("app_imports", time.perf_counter() - _import_start)
+
+# Plotly figures are serialized for the browser here, so this is the render cost
+plotly_chart = instrumented("render_chart")(st.plotly_chart)
 
 # Custom CSS for styling
 st.set_page_config(page_title="Attrition Insight System", layout="wide", page_icon="📈")
@@ -69,6 +104,15 @@ if "logged_in" not in st.session_state:
     login()
     st.stop()
 
+# Load the model, preprocessor and LLM client while the user picks a dataset
+warm_up_in_background(get_client)
+
+with st.sidebar.expander("⏱ Startup Timings"):
+    st.json({name: round(seconds, 3) for name, seconds in startup_report().items()})
+
+with st.sidebar.expander("🧠 Insight Cache"):
+    st.json(get_insight_cache().stats())
+
 # Main tabs
 tabs = st.tabs(["📊 Executive Dashboard", "🧑💼 Employee Insights", "📤 Export Report"])
 
@@ -81,20 +125,18 @@ with tabs[0]:
         if "EmployeeID" not in df.columns:
             df["EmployeeID"] = df.index + 1000
 
-            pred_df = predict_attrition(df)
-            at_risk = pred_df[pred_df["Attrition_Probability"] > 0.6]
+        pred_df = cached_predict_attrition(df)
+        # Charts and cards below only read these small rollup tables
+        summary = cached_dashboard_summary(pred_df)
+        kpis = summary["kpis"]
 
         # Key Metrics
         cols = st.columns(4)
         metrics = [
-            ("👥 Total Employees", len(pred_df), ""),
-            ("⚠️ At-Risk Employees", len(at_risk), "risk-high"),
-            (
-                "📉 Avg. Risk Score",
-                f"{pred_df['Attrition_Probability'].mean() * 100:.1f}%",
-                "",
-            ),
-            ("🌟 Avg. Engagement", f"{pred_df['engagement_score'].mean():.1f}/5", ""),
+            ("👥 Total Employees", kpis["total_employees"], ""),
+            ("⚠️ At-Risk Employees", kpis["at_risk_employees"], "risk-high"),
+            ("📉 Avg. Risk Score", f"{kpis['avg_risk'] * 100:.1f}%", ""),
+            ("🌟 Avg. Engagement", f"{kpis['avg_engagement']:.1f}/5", ""),
         ]
 
         for col, (label, value, style) in zip(cols, metrics):
@@ -114,36 +156,34 @@ with tabs[0]:
         col1, col2 = st.columns([2, 1])
         with col1:
             # Risk Distribution by Department
-            dept_risk = (
-                pred_df.groupby("department")["Attrition_Probability"]
-                .mean()
-                .reset_index()
-            )
             fig = px.bar(
-                dept_risk.sort_values("Attrition_Probability", ascending=False),
+                summary["department"],
                 x="department",
                 y="Attrition_Probability",
                 color="Attrition_Probability",
                 color_continuous_scale="RdYlGn_r",
                 title="Departmental Attrition Risk Levels",
             )
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(fig, use_container_width=True)
 
         with col2:
             # Clear Risk Segmentation
-            risk_counts = pred_df["Risk_Label"].value_counts().reset_index()
             fig = px.bar(
-                risk_counts,
+                summary["risk_counts"],
                 x="count",
                 y="Risk_Label",
                 orientation="h",
                 color="Risk_Label",
-                color_discrete_map={"High Risk": "#e74c3c", "Low Risk": "#2ecc71"},
+                color_discrete_map={
+                    "High Risk": "#e74c3c",
+                    "Medium Risk": "#f39c12",
+                    "Low Risk": "#2ecc71",
+                },
                 title="Employee Risk Distribution",
                 labels={"count": "Number of Employees", "Risk_Label": "Risk Category"},
             )
             fig.update_layout(showlegend=False)
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(fig, use_container_width=True)
 
         st.markdown("---")
         st.subheader("Key Drivers Analysis")
@@ -151,31 +191,40 @@ with tabs[0]:
         col1, col2 = st.columns(2)
         with col1:
             # Engagement vs Attrition
+            chart = cached_engagement_chart_data(pred_df)
             fig = px.scatter(
-                pred_df,
+                chart["points"],
                 x="engagement_score",
                 y="Attrition_Probability",
                 color="department",
-                trendline="lowess",
+                size="employees" if chart["binned"] else None,
+                hover_data=["employees"] if chart["binned"] else None,
                 title="Engagement Score vs Attrition Risk",
                 labels={"engagement_score": "Engagement Score (1-5)"},
             )
-            st.plotly_chart(fig, use_container_width=True)
+            colors = {trace.name: trace.marker.color for trace in fig.data}
+            for department, line in chart["trendlines"].groupby(
+                "department", sort=False
+            ):
+                fig.add_scatter(
+                    x=line["engagement_score"],
+                    y=line["Attrition_Probability"],
+                    mode="lines",
+                    line=dict(color=colors.get(department)),
+                    name=department,
+                    legendgroup=department,
+                    showlegend=False,
+                )
+            if chart["binned"]:
+                st.caption(
+                    "Points are binned; marker size shows the number of employees."
+                )
+            plotly_chart(fig, use_container_width=True)
 
         with col2:
             # Tenure Impact Analysis
-            tenure_bins = pd.cut(pred_df["tenure"], bins=5)
-            tenure_bins_str = tenure_bins.astype(str)  # Convert intervals to string
-
-            # Now, you can group by the tenure bins (which are strings now)
-            tenure_risk = (
-                pred_df.groupby(tenure_bins_str)["Attrition_Probability"]
-                .mean()
-                .reset_index()
-            )
-
             fig = px.line(
-                tenure_risk,
+                summary["tenure"],
                 x="tenure",
                 y="Attrition_Probability",
                 markers=True,
@@ -186,54 +235,84 @@ with tabs[0]:
                 },
             )
             fig.update_traces(line=dict(color="#e74c3c", width=2.5))
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(fig, use_container_width=True)
 
         # --- Departmental Analysis Section from main_2.py ---
         st.markdown("---")
         st.subheader("Departmental Analysis")
 
-        # Department Metrics
-        dept_df = (
-            pred_df.groupby("department")
-            .agg(
-                {
-                    "Attrition_Probability": "mean",
-                    "EmployeeID": "count",
-                    "engagement_score": "mean",
-                }
-            )
-            .reset_index()
-        )
-
+        # Department Metrics, already sorted by risk
         cols = st.columns(3)
-        for idx, row in dept_df.sort_values(
-            "Attrition_Probability", ascending=False
-        ).iterrows():
+        for idx, row in enumerate(summary["department"].itertuples(index=False)):
             with cols[idx % 3]:
                 st.markdown(
                     f'<div class="department-card">'
-                    f'<h4>{row["department"]}</h4>'
+                    f"<h4>{row.department}</h4>"
                     f'<div style="margin: 1rem 0;">'
-                    f'<div>👥 Employees: {row["EmployeeID"]}</div>'
-                    f'<div>📉 Risk: {row["Attrition_Probability"]*100:.1f}%</div>'
-                    f'<div>🌟 Engagement: {row["engagement_score"]:.1f}/5</div>'
-                    f'</div></div>',
+                    f"<div>👥 Employees: {row.employees}</div>"
+                    f"<div>📉 Risk: {row.Attrition_Probability*100:.1f}%</div>"
+                    f"<div>🌟 Engagement: {row.engagement_score:.1f}/5</div>"
+                    f"</div></div>",
                     unsafe_allow_html=True,
                 )
 
-        st.session_state["pred_df"] = pred_df
-        st.session_state["at_risk"] = at_risk
+        # Sessions keep a handle on the shared predictions, never a copy
+        st.session_state["predictions"] = session_predictions(
+            pred_df, st.session_state.get("predictions")
+        )
 
 with tabs[1]:
     # Preserved Employee Insights Tab
     st.subheader("🧑💼 Employee Risk Analysis")
-    if "pred_df" in st.session_state:
-        # Interactive Data Grid
+    if "predictions" in st.session_state:
+        predictions = st.session_state["predictions"]
+        explorer = get_explorer_index(predictions.frame)
+        # Every employee's drivers, computed once per scored dataset
+        attributions = get_attributions(predictions.frame)
+        # Interactive Data Grid: filtered, sorted and paged on the server, so
+        # only the visible page is sent to the browser
         col1, col2 = st.columns([2, 1])
         with col1:
             st.markdown("### 🎯 Employee Risk Explorer")
-            filtered_df = st.data_editor(
-                st.session_state["pred_df"],
+            filter_cols = st.columns(3)
+            departments = filter_cols[0].multiselect("Department", explorer.departments)
+            risk_levels = filter_cols[1].multiselect("Risk Level", RISK_LABELS)
+            risk_range = filter_cols[2].slider(
+                "Risk Score", 0.0, 1.0, (0.0, 1.0), step=0.01
+            )
+            sort_cols = st.columns([2, 1, 1])
+            sort_options = list(explorer.df.columns)
+            sort_by = sort_cols[0].selectbox(
+                "Sort by",
+                sort_options,
+                index=sort_options.index("Attrition_Probability"),
+            )
+            descending = sort_cols[1].toggle("Descending", value=True)
+            page_size = sort_cols[2].selectbox("Rows per page", PAGE_SIZES, index=1)
+
+            # Changing the filters or the order starts again from page one
+            query = (
+                tuple(departments),
+                tuple(risk_levels),
+                risk_range,
+                sort_by,
+                descending,
+                page_size,
+            )
+            if st.session_state.get("explorer_query") != query:
+                st.session_state["explorer_query"] = query
+                st.session_state["explorer_page"] = 1
+            page = explorer.query(
+                departments=departments,
+                risk_labels=risk_levels,
+                probability_range=None if risk_range == (0.0, 1.0) else risk_range,
+                sort_by=sort_by,
+                ascending=not descending,
+                page=st.session_state.get("explorer_page", 1) - 1,
+                page_size=page_size,
+            )
+            st.dataframe(
+                page.rows,
                 column_config={
                     "Attrition_Probability": st.column_config.ProgressColumn(
                         "Risk Score",
@@ -250,45 +329,116 @@ with tabs[1]:
                 hide_index=True,
                 use_container_width=True,
             )
+            nav_cols = st.columns([1, 3])
+            st.session_state["explorer_page"] = page.page + 1
+            nav_cols[0].number_input(
+                "Page", min_value=1, max_value=page.pages, key="explorer_page"
+            )
+            nav_cols[1].caption(
+                f"Showing {page.first_row:,}–{page.first_row + len(page.rows) - 1:,}"
+                f" of {page.total:,} employees"
+                if page.total
+                else "No employees match these filters"
+            )
 
         with col2:
             st.markdown("### 🔍 Employee Detail View")
-            selected_id = st.selectbox(
-                "Select Employee ID", options=filtered_df["EmployeeID"].unique()
-            )
-            employee = filtered_df[filtered_df["EmployeeID"] == selected_id].iloc[0]
-
-            st.markdown(
-                f"""
-            <div class="metric-card">
-                <h4>Employee #{selected_id}</h4>
-                <p>Department: {employee['department']}<br>
-                Tenure: {employee['tenure']} years<br>
-                Engagement: {employee['engagement_score']}/5<br>
-                Risk Score: <span class="{'risk-high' if employee['Attrition_Probability'] > 0.6 else 'risk-low'}">
-                {employee['Attrition_Probability']:.0%}</span></p>
-            </div>
-            """,
-                unsafe_allow_html=True,
+            search = st.text_input(
+                "Search Employee ID", placeholder="Any ID, on any page"
+            ).strip()
+            employee = explorer.lookup(search) if search else None
+            if search and employee is None:
+                st.warning(f"No employee with ID {search}")
+            if employee is None and len(page.rows):
+                # Only the employees on the visible page are listed
+                position = st.selectbox(
+                    "Select Employee ID",
+                    options=range(len(page.rows)),
+                    format_func=lambda i: str(page.rows["EmployeeID"].iloc[i]),
+                )
+                employee = page.rows.iloc[position]
+            if employee is not None:
+                selected_id = employee["EmployeeID"]
+                st.markdown(
+                    f"""
+                <div class="metric-card">
+                    <h4>Employee #{selected_id}</h4>
+                    <p>Department: {employee['department']}<br>
+                    Tenure: {employee['tenure']:g} years<br>
+                    Engagement: {employee['engagement_score']}/5<br>
+                    Risk Score: <span class="{'risk-high' if is_high_risk(employee['Attrition_Probability']) else 'risk-low'}">
+                    {employee['Attrition_Probability']:.0%}</span></p>
+                </div>
+                """,
+                    unsafe_allow_html=True,
+                )
+                drivers = attributions.drivers(selected_id)
+                if drivers:
+                    st.markdown("**Top risk drivers**")
+                    st.markdown(format_drivers(drivers))
+
+                # Generate Insights# In your Employee Insights tab (tabs[1]):
+                if st.button("🧠 Generate Retention Plan", type="primary"):
+                    # Render each section as soon as its header streams in
+                    placeholders = {}
+                    for key, title in (
+                        ("diagnostic", "### 📉 Diagnostic Insight"),
+                        ("prescriptive", "### ✅ Prescriptive Actions"),
+                        ("preventive", "### 🛡 Preventive Strategy"),
+                    ):
+                        st.markdown(title)
+                        placeholders[key] = st.empty()
+
+                    rendered = {}
+                    for insights in stream_insights(
+                        employee.to_dict(), drivers=drivers
+                    ):
+                        for key, text in insights.items():
+                            if text and text != rendered.get(key):
+                                placeholders[key].markdown(text)
+                                rendered[key] = text
+
+        # Retention plans for the whole at-risk cohort, generated concurrently
+        st.markdown("---")
+        st.markdown("### 🧠 Cohort Retention Plans")
+        if st.button(
+            f"Generate plans for all {predictions.at_risk_count} at-risk employees",
+            disabled=not predictions.at_risk_count,
+        ):
+            at_risk = predictions.at_risk
+            progress = st.progress(0.0, text="Generating cohort insights...")
+            plans = pd.DataFrame(
+                generate_insights_batch(
+                    at_risk.to_dict("records"),
+                    drivers=[
+                        attributions.drivers_at(position)
+                        for position in predictions.at_risk_rows
+                    ],
+                    progress_callback=lambda done, total: progress.progress(
+                        done / total, text=f"{done}/{total} plans generated"
+                    ),
+                )
             )
+            plans.insert(0, "EmployeeID", at_risk["EmployeeID"].to_numpy())
+            st.session_state["cohort_plans"] = plans
 
-            # Generate Insights# In your Employee Insights tab (tabs[1]):
-            if st.button("🧠 Generate Retention Plan", type="primary"):
-                with st.spinner("Generating AI insights..."):
-                    insights = generate_insights(employee.to_dict())
-
-                    st.markdown("### 📉 Diagnostic Insight")
-                    st.markdown(insights["diagnostic"])
-
-                    st.markdown("### ✅ Prescriptive Actions")
-                    st.markdown(insights["prescriptive"])
-
-                    st.markdown("### 🛡 Preventive Strategy")
-                    st.markdown(insights["preventive"])
+        if "cohort_plans" in st.session_state:
+            st.dataframe(
+                st.session_state["cohort_plans"],
+                hide_index=True,
+                use_container_width=True,
+            )
+            st.download_button(
+                label="📥 Download Cohort Plans",
+                data=st.session_state["cohort_plans"].to_csv(index=False),
+                file_name="cohort_retention_plans.csv",
+                mime="text/csv",
+            )
 
 with tabs[2]:
     st.subheader("📤 Report Generation")
-    if "pred_df" in st.session_state:
+    if "predictions" in st.session_state:
+        predictions = st.session_state["predictions"]
         # Professional Report Section
         st.markdown("### 📑 Executive Summary Report")
 
@@ -299,7 +449,7 @@ with tabs[2]:
                     "Report Scope", ["Full Organization", "High Risk Employees Only"]
                 )
             with col2:
-                report_format = st.selectbox("Format", ["PDF", "PowerPoint", "Excel"])
+                report_format = st.selectbox("Format", list(REPORT_FORMATS))
 
         # Report Preview
         st.markdown("### 📋 Report Preview")
@@ -307,16 +457,16 @@ with tabs[2]:
             st.markdown("#### 🏢 Organization Attrition Overview")
             col1, col2 = st.columns(2)
             with col1:
-                st.metric("Total Employees", len(st.session_state["pred_df"]))
+                st.metric("Total Employees", len(predictions.frame))
                 st.metric(
                     "Average Tenure",
-                    f"{st.session_state['pred_df']['tenure'].mean():.1f} years",
+                    f"{predictions.frame['tenure'].mean():.1f} years",
                 )
             with col2:
-                st.metric("High Risk Employees", len(st.session_state["at_risk"]))
+                st.metric("High Risk Employees", predictions.at_risk_count)
                 st.metric(
                     "Average Engagement Score",
-                    f"{st.session_state['pred_df']['engagement_score'].mean():.1f}/5",
+                    f"{predictions.frame['engagement_score'].mean():.1f}/5",
                 )
 
             st.divider()
@@ -327,12 +477,89 @@ with tabs[2]:
             - Identification of high-risk employee segments
             """)
 
-        # Export Controls
+        # Export Controls: the file is only built when the button is clicked
+        high_risk_only = report_scope == "High Risk Employees Only"
+
+        def export_report(
+            frame=predictions.frame,
+            report_format=report_format,
+            rows=predictions.at_risk_rows if high_risk_only else None,
+        ):
+            with build_report(frame, report_format, rows) as report:
+                return report.read()
+
         st.download_button(
-            label="📥 Download Full Report",
-            data=st.session_state["pred_df"].to_csv(index=False),
-            file_name="attrition_analysis_report.csv",
-            mime="text/csv",
+            label=(
+                "📥 Download High Risk Report"
+                if high_risk_only
+                else "📥 Download Full Report"
+            ),
+            data=export_report,
+            file_name=report_file_name(
+                (
+                    "high_risk_employees_report"
+                    if high_risk_only
+                    else "attrition_analysis_report"
+                ),
+                report_format,
+            ),
+            mime=REPORT_FORMATS[report_format]["mime"],
             use_container_width=True,
             type="primary",
         )
+
+# Rendered last so they include everything this run stored and recorded
+memory = session_memory_report(st.session_state)
+run_context = get_script_run_ctx()
+record_session_report(run_context.session_id if run_context else "local", memory)
+with st.sidebar.expander("💾 Session Memory", expanded=memory["over_budget"]):
+    if memory["over_budget"]:
+        st.warning(
+            f"This session holds {memory['session_mb']:,.1f} MB, over its "
+            f"{memory['budget_mb']:,.0f} MB budget."
+        )
+    st.json(memory)
+
+if is_admin():
+    with st.sidebar.expander("🩺 Diagnostics"):
+        stages = instrumentation.stages()
+        if stages:
+            st.markdown("**Stages**")
+            st.dataframe(
+                pd.DataFrame.from_dict(stages, orient="index")[
+                    [
+                        "calls",
+                        "errors",
+                        "rows",
+                        "seconds_last",
+                        "seconds_mean",
+                        "seconds_max",
+                        "memory_delta_mb_last",
+                        "memory_delta_mb_max",
+                    ]
+                ].round(3),
+                use_container_width=True,
+            )
+        st.markdown("**Counters**")
+        st.json(instrumentation.counters())
+        events = pd.DataFrame(instrumentation.events()[-20:][::-1])
+        if not events.empty:
+            events["time"] = pd.to_datetime(events["time"], unit="s")
+            st.markdown("**Recent calls**")
+            st.dataframe(events, hide_index=True, use_container_width=True)
+        st.markdown("**Sessions**")
+        st.dataframe(
+            pd.DataFrame.from_dict(session_reports(), orient="index").drop(
+                columns="largest", errors="ignore"
+            ),
+            use_container_width=True,
+        )
+        st.download_button(
+            "Download Prometheus metrics",
+            data=instrumentation.prometheus_text(),
+            file_name="attrition_metrics.prom",
+            mime="text/plain",
+        )
+        if st.button("Reset diagnostics"):
+            instrumentation.reset()
+            st.rerun()
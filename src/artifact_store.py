@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import sys
+
+import joblib
+import numpy as np
+
+sys.path.append(os.path.dirname(__file__))
+
+# Unpickling a scikit-learn forest copies every tree's node arrays into the
+# process heap, so each Streamlit worker would hold its own copy of the model.
+# The forest can be exported instead as flat .npy arrays that are
+# memory-mapped read-only and shared by every process on the host. NumPy
+# traversal is slower than scikit-learn's for large batches, so this is a
+# memory/throughput trade-off chosen with MODEL_ARTIFACT_FORMAT=arrays.
+# Run `python src/artifact_store.py` again after replacing the model pickle.
+
+ARRAY_NAMES = (
+    "children_left",
+    "children_right",
+    "feature",
+    "threshold",
+    "missing_go_to_left",
+    "value",
+    "roots",
+)
+META_FILE = "meta.json"
+# Rows traversed at once; bounds the (rows x trees) working arrays
+TRAVERSAL_BLOCK_ROWS = 4096
+
+
+# (path, mtime, size) -> digest, so artifacts are only re-hashed when replaced
+_artifact_digests = {}
+
+
+def artifact_fingerprint(path):
+    """Content hash of a model artifact, recomputed only when the file changes"""
+    stat = os.stat(path)
+    signature = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    if signature not in _artifact_digests:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        _artifact_digests[signature] = digest.hexdigest()
+    return _artifact_digests[signature]
+
+
+def array_dir_for(model_path):
+    """Directory holding the exported arrays of a pickled model"""
+    return os.path.splitext(model_path)[0]
+
+
+class ForestArrays:
+    """predict_proba for a tree ensemble stored as flat node arrays.
+
+    Node indices of all trees share one array, with ``roots`` holding the
+    first node of each tree. Trees are summed in order, as scikit-learn does,
+    so probabilities are identical to the fitted estimator's.
+    """
+
+    def __init__(self, arrays, meta):
+        for name in ARRAY_NAMES:
+            setattr(self, name, arrays[name])
+        self.meta = meta
+        self.classes_ = np.asarray(meta["classes"])
+        self.n_features_in_ = meta["n_features_in"]
+        self.n_estimators = len(self.roots)
+        self.max_depth = meta["max_depth"]
+
+    @classmethod
+    def from_estimator(cls, model, source_digest=None):
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+        leaf = np.concatenate([t.children_left < 0 for t in trees])
+        node = np.arange(len(leaf))
+
+        def children(attribute):
+            child = np.concatenate(
+                [getattr(t, attribute) + o for t, o in zip(trees, offsets)]
+            )
+            # Leaves point at themselves, so traversal needs no leaf masking
+            return np.where(leaf, node, child).astype(np.int32)
+
+        arrays = {
+            "children_left": children("children_left"),
+            "children_right": children("children_right"),
+            "feature": np.where(
+                leaf, 0, np.concatenate([t.feature for t in trees])
+            ).astype(np.int32),
+            "threshold": np.where(
+                leaf, np.inf, np.concatenate([t.threshold for t in trees])
+            ),
+            "missing_go_to_left": np.concatenate(
+                [t.missing_go_to_left for t in trees]
+            ).astype(bool),
+            # Class fractions of every node; trees of a classifier forest have
+            # a single output
+            "value": np.concatenate(
+                [t.value[:, 0, : len(model.classes_)] for t in trees]
+            ),
+            "roots": offsets[:-1].astype(np.int32),
+        }
+        meta = {
+            "classes": model.classes_.tolist(),
+            "n_features_in": int(model.n_features_in_),
+            "max_depth": int(max(t.max_depth for t in trees)),
+            "source_digest": source_digest,
+        }
+        return cls(arrays, meta)
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAY_NAMES:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, META_FILE), "w") as f:
+            json.dump(self.meta, f, indent=2)
+
+    @classmethod
+    def load(cls, directory, mmap_mode="r"):
+        with open(os.path.join(directory, META_FILE)) as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in ARRAY_NAMES
+        }
+        return cls(arrays, meta)
+
+    def apply(self, X):
+        """Leaf node reached by every row in every tree, shape (rows, trees)"""
+        # Trees compare float32 features against float64 thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        has_missing = np.isnan(flat_X).any()
+
+        leaves = np.tile(self.roots, n_rows)
+        # Flat positions of the (row, tree) pairs still descending, their
+        # current node and the offset of their row in flat_X
+        active = np.arange(len(leaves))
+        node = leaves.copy()
+        row_offset = np.repeat(
+            np.arange(n_rows, dtype=np.int64) * n_features, self.n_estimators
+        )
+        for _ in range(self.max_depth):
+            x = flat_X[row_offset + self.feature[node]]
+            go_left = x <= self.threshold[node]
+            if has_missing:
+                go_left |= np.isnan(x) & self.missing_go_to_left[node]
+            child = np.where(
+                go_left, self.children_left[node], self.children_right[node]
+            )
+            moved = child != node
+            leaves[active] = child
+            active, node, row_offset = active[moved], child[moved], row_offset[moved]
+            if not len(active):
+                break
+        return leaves.reshape(n_rows, self.n_estimators)
+
+    def predict_proba(self, X):
+        X = np.asarray(X)
+        proba = np.zeros((len(X), len(self.classes_)), dtype=np.float64)
+        for start in range(0, len(X), TRAVERSAL_BLOCK_ROWS):
+            block = slice(start, start + TRAVERSAL_BLOCK_ROWS)
+            leaves = self.apply(X[block])
+            # cumsum adds the trees one after another, in scikit-learn's order
+            proba[block] = np.cumsum(self.value[leaves], axis=1)[:, -1]
+        proba /= self.n_estimators
+        return proba
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def export_forest(model_path, directory=None):
+    """Export a pickled forest next to it as memory-mappable arrays"""
+    directory = directory or array_dir_for(model_path)
+    model = joblib.load(model_path)
+    forest = ForestArrays.from_estimator(
+        model, source_digest=artifact_fingerprint(model_path)
+    )
+    forest.save(directory)
+    return directory
+
+
+def load_model_artifact(model_path, mmap_mode="r", use_arrays=False):
+    """Load the model, optionally from its exported arrays.
+
+    The arrays are only used if they were exported from the pickle that is
+    on disk now, so swapping in a new model never serves stale trees.
+    """
+    directory = array_dir_for(model_path)
+    if use_arrays and os.path.exists(os.path.join(directory, META_FILE)):
+        forest = ForestArrays.load(directory, mmap_mode=mmap_mode)
+        if forest.meta.get("source_digest") == artifact_fingerprint(model_path):
+            return forest
+    return joblib.load(model_path, mmap_mode=mmap_mode)
+
+
+if __name__ == "__main__":
+    from utils import MODEL_PATH
+
+    print(f"Exported arrays to {export_forest(MODEL_PATH)}")
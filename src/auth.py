@@ -1,4 +1,6 @@
 # auth.py
+import os
+
 import streamlit as st
 from streamlit_extras.colored_header import colored_header
 from streamlit_extras.stylable_container import stylable_container
@@ -75,6 +77,7 @@ def login():
                     if st.form_submit_button("Access Dashboard →", type="primary"):
                         if USERS.get(user) == pwd:
                             st.session_state["logged_in"] = True
+                            st.session_state["username"] = user
                             st.rerun()
                         else:
                             st.error("Invalid credentials")
@@ -89,6 +92,16 @@ def login():
                 )
 
 
+def is_admin():
+    """Whether the logged-in user is listed in the ADMIN_USERS env variable.
+
+    ADMIN_USERS is a comma-separated list of user names, read on each call so
+    values loaded from .env after this module is imported still apply.
+    """
+    admins = {user.strip() for user in os.getenv("ADMIN_USERS", "").split(",")}
+    return st.session_state.get("username") in admins - {""}
+
+
 # 4. Execution control
 if __name__ == "__main__":
     if "logged_in" not in st.session_state:
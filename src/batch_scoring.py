@@ -0,0 +1,267 @@
+"""Score employee extracts outside the app, with bounded memory.
+
+Usage:
+    python src/batch_scoring.py employees.parquet -o scores.parquet --workers 4
+    python src/batch_scoring.py azure://hr-exports/employees.csv -o scores.csv
+"""
+
+import argparse
+import atexit
+import contextlib
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+sys.path.append(os.path.dirname(__file__))
+from preprocessing_pipeline import INPUT_COLUMNS
+from blob_store import open_blob
+from storage_logic import (
+    DEFAULT_CHUNKSIZE,
+    file_format_for,
+    get_azure_credentials,
+    iter_dataset,
+    LOAD_COLUMNS,
+)
+from utils import (
+    add_risk_columns,
+    get_model,
+    get_preprocessor,
+    predict_attrition,
+    score_probabilities,
+)
+
+OUTPUT_FORMATS = ("csv", "parquet")
+
+AZURE_SCHEME = "azure://"
+
+# Worker processes used by the parallel backend; 1 keeps scoring serial
+DEFAULT_WORKERS = int(os.getenv("SCORING_WORKERS", "1"))
+# Below this many rows the cost of shipping shards to workers outweighs the gain
+MIN_PARALLEL_ROWS = 10_000
+# Shards per worker, so a slow shard does not leave the other workers idle
+SHARDS_PER_WORKER = 4
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _init_worker():
+    """Load the pickled model and preprocessor once per worker process"""
+    get_preprocessor()
+    get_model()
+
+
+def _get_pool(workers):
+    """Return the shared process pool, rebuilding it if the worker count changed"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown()
+            # spawn rather than fork: Streamlit runs scripts on threads
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool():
+    """Stop the worker processes of the parallel backend"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool, _pool_workers = None, 0
+
+
+atexit.register(shutdown_pool)
+
+
+def predict_attrition_parallel(df, workers=None):
+    """Score a DataFrame by sharding it across a process pool.
+
+    Shards are contiguous row ranges and results are gathered in submission
+    order, so row order and probabilities are identical to ``predict_attrition``.
+    """
+    workers = workers or DEFAULT_WORKERS
+    if workers <= 1 or len(df) < MIN_PARALLEL_ROWS:
+        return predict_attrition(df)
+
+    # Only ship the columns the preprocessor reads to the workers
+    inputs = df[df.columns.intersection(INPUT_COLUMNS, sort=False)]
+    bounds = np.linspace(0, len(df), workers * SHARDS_PER_WORKER + 1, dtype=int)
+    shards = [inputs.iloc[start:stop] for start, stop in zip(bounds, bounds[1:])]
+    probs = np.concatenate(list(_get_pool(workers).map(score_probabilities, shards)))
+    return add_risk_columns(df, probs)
+
+
+def _infer_output_format(destination):
+    extension = os.path.splitext(str(destination))[1].lower()
+    return "parquet" if extension in (".parquet", ".pq") else "csv"
+
+
+def iter_scored_chunks(
+    source, chunksize=DEFAULT_CHUNKSIZE, workers=None, file_format="csv", columns=None
+):
+    """Read a file in chunks of ``chunksize`` rows and yield each chunk scored.
+
+    Chunks come from storage_logic.iter_dataset, so every input is read
+    with the same declared column types as in the app. All columns are
+    kept unless ``columns`` narrows them.
+    """
+    for chunk in iter_dataset(
+        source, file_format, chunksize=chunksize, columns=columns
+    ):
+        yield predict_attrition_parallel(chunk, workers=workers)
+
+
+def write_scored_chunks(chunks, destination, output_format=None):
+    """Append scored chunks to a CSV or Parquet file, returning the row count"""
+    output_format = output_format or _infer_output_format(destination)
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format: {output_format}")
+
+    rows = 0
+    if output_format == "csv":
+        for chunk in chunks:
+            chunk.to_csv(
+                destination,
+                mode="w" if rows == 0 else "a",
+                header=rows == 0,
+                index=False,
+            )
+            rows += len(chunk)
+        return rows
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(destination, table.schema)
+            writer.write_table(table.cast(writer.schema))
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def stream_predict_attrition(
+    source,
+    destination,
+    chunksize=DEFAULT_CHUNKSIZE,
+    output_format=None,
+    workers=None,
+    file_format="csv",
+    columns=None,
+):
+    """Score a file of any size with bounded memory and write results incrementally.
+
+    Every chunk goes through the same preprocessor and model as
+    ``predict_attrition``, so the written rows equal a one-shot score of the
+    same file read with read_dataset.
+    """
+    chunks = iter_scored_chunks(
+        source,
+        chunksize=chunksize,
+        workers=workers,
+        file_format=file_format,
+        columns=columns,
+    )
+    return write_scored_chunks(chunks, destination, output_format=output_format)
+
+
+@contextlib.contextmanager
+def open_input(location, file_format):
+    """Yield a local path, or an Azure blob given as azure://container/blob"""
+    if not location.startswith(AZURE_SCHEME):
+        yield location
+        return
+    conn_str, default_container = get_azure_credentials()
+    container, _, blob_name = location[len(AZURE_SCHEME) :].partition("/")
+    if not blob_name:
+        # azure://blob uses the configured container
+        container, blob_name = default_container, container
+    with open_blob(
+        conn_str, container, blob_name, seekable=file_format != "csv"
+    ) as source:
+        yield source
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process and of its largest finished child"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None, None
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    unit = 1 if sys.platform == "darwin" else 1024
+    return tuple(
+        resource.getrusage(who).ru_maxrss * unit / 1024**2
+        for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch attrition scoring")
+    parser.add_argument(
+        "input", help="CSV, Parquet or Arrow file, or azure://container/blob"
+    )
+    parser.add_argument("-o", "--output", required=True, help="CSV or Parquet file")
+    parser.add_argument("--input-format", choices=("csv", "parquet", "arrow"))
+    parser.add_argument("--output-format", choices=OUTPUT_FORMATS)
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument(
+        "--workers", type=int, default=DEFAULT_WORKERS, help="scoring processes"
+    )
+    parser.add_argument(
+        "--model-columns-only",
+        action="store_true",
+        help="drop input columns the model does not use from the output",
+    )
+    args = parser.parse_args(argv)
+
+    input_format = args.input_format or file_format_for(args.input, default="csv")
+    columns = LOAD_COLUMNS if args.model_columns_only else None
+    start = time.perf_counter()
+    try:
+        with open_input(args.input, input_format) as source:
+            rows = stream_predict_attrition(
+                source,
+                args.output,
+                chunksize=args.chunksize,
+                output_format=args.output_format,
+                workers=args.workers,
+                file_format=input_format,
+                columns=columns,
+            )
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"error: {e}\n")
+    elapsed = time.perf_counter() - start
+    # Workers only count towards RUSAGE_CHILDREN once they have exited
+    shutdown_pool()
+
+    own_rss, worker_rss = peak_rss_mb()
+    print(f"rows:        {rows:,}")
+    print(f"elapsed:     {elapsed:.2f}s")
+    print(f"throughput:  {rows / elapsed if elapsed else 0:,.0f} rows/sec")
+    if own_rss is not None:
+        print(f"peak RSS:    {own_rss:,.0f} MB", end="")
+        print(f" (largest worker {worker_rss:,.0f} MB)" if args.workers > 1 else "")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+import contextlib
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from azure.core import MatchConditions
+from azure.storage.blob import BlobServiceClient
+
+# Downloaded blobs are kept here with their ETag; set to "" to disable
+BLOB_CACHE_DIR = os.getenv(
+    "BLOB_CACHE_DIR", os.path.join(os.path.dirname(__file__), ".cache", "blobs")
+)
+BLOB_CACHE_MAX_ENTRIES = int(os.getenv("BLOB_CACHE_MAX_ENTRIES", "16"))
+# Ranged GETs in flight at once, and the size of each range
+BLOB_DOWNLOAD_CONCURRENCY = int(os.getenv("BLOB_DOWNLOAD_CONCURRENCY", "4"))
+BLOB_CHUNK_BYTES = int(os.getenv("BLOB_CHUNK_MB", "4")) * 1024**2
+
+_service_clients = {}
+_service_clients_lock = threading.Lock()
+
+
+def get_blob_client(conn_str, container, blob_name):
+    """Blob client on a service client shared per connection string.
+
+    The service client owns the HTTP connection pool, so reusing it keeps
+    connections alive across loads instead of reconnecting every time.
+    """
+    with _service_clients_lock:
+        if conn_str not in _service_clients:
+            _service_clients[conn_str] = BlobServiceClient.from_connection_string(
+                conn_str
+            )
+        service = _service_clients[conn_str]
+    return service.get_blob_client(container=container, blob=blob_name)
+
+
+class BlobCache:
+    """Local copies of blobs, each stored with the ETag it was downloaded at"""
+
+    def __init__(self, directory, max_entries=16):
+        self.directory = directory
+        self.max_entries = max_entries
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, blob_client):
+        key = hashlib.sha256(blob_client.url.encode()).hexdigest()[:32]
+        base = os.path.join(self.directory, key)
+        return f"{base}.blob", f"{base}.json"
+
+    def lookup(self, blob_client, etag):
+        """Path of the cached copy if it was downloaded at ``etag``"""
+        data_path, meta_path = self._paths(blob_client)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get("etag") != etag or not os.path.exists(data_path):
+            return None
+        os.utime(meta_path)
+        return data_path
+
+    def staging_file(self):
+        """Open a temporary file that commit() later moves into place"""
+        return tempfile.NamedTemporaryFile(
+            dir=self.directory, suffix=".part", delete=False
+        )
+
+    def commit(self, blob_client, staged_path, etag):
+        data_path, meta_path = self._paths(blob_client)
+        os.replace(staged_path, data_path)
+        with open(meta_path, "w") as f:
+            json.dump({"url": blob_client.url, "etag": etag}, f)
+        self._prune()
+        return data_path
+
+    def _prune(self):
+        metas = sorted(
+            (
+                os.path.join(self.directory, name)
+                for name in os.listdir(self.directory)
+                if name.endswith(".json")
+            ),
+            key=os.path.getmtime,
+        )
+        for meta_path in metas[: -self.max_entries]:
+            for path in (meta_path, meta_path[: -len(".json")] + ".blob"):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(path)
+
+
+class RangedBlobReader(io.RawIOBase):
+    """Read-only stream over a blob fetched as parallel ranged GETs.
+
+    Up to ``concurrency`` ranges are downloaded ahead of the reader and
+    handed over in order, so memory stays at about concurrency x chunk size.
+    Every range is conditional on ``etag``; a blob replaced mid-read raises
+    instead of mixing two versions. Bytes read can be copied to ``tee``.
+    """
+
+    def __init__(
+        self,
+        blob_client,
+        size,
+        etag,
+        chunk_size=BLOB_CHUNK_BYTES,
+        concurrency=BLOB_DOWNLOAD_CONCURRENCY,
+        tee=None,
+    ):
+        super().__init__()
+        self.blob_client = blob_client
+        self.etag = etag
+        self.tee = tee
+        self._ranges = deque(
+            (offset, min(chunk_size, size - offset))
+            for offset in range(0, size, chunk_size)
+        )
+        self._executor = ThreadPoolExecutor(max_workers=max(concurrency, 1))
+        self._pending = deque()
+        self._concurrency = max(concurrency, 1)
+        self._buffer = memoryview(b"")
+        self.bytes_read = 0
+
+    def _fetch(self, offset, length):
+        return self.blob_client.download_blob(
+            offset=offset,
+            length=length,
+            etag=self.etag,
+            match_condition=MatchConditions.IfNotModified,
+        ).readall()
+
+    def _schedule(self):
+        while self._ranges and len(self._pending) < self._concurrency:
+            self._pending.append(
+                self._executor.submit(self._fetch, *self._ranges.popleft())
+            )
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if not self._buffer:
+            self._schedule()
+            if not self._pending:
+                return 0
+            chunk = self._pending.popleft().result()
+            self._schedule()
+            if self.tee is not None:
+                self.tee.write(chunk)
+            self._buffer = memoryview(chunk)
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        self.bytes_read += size
+        return size
+
+    @property
+    def exhausted(self):
+        return not (self._ranges or self._pending or self._buffer)
+
+    def close(self):
+        for future in self._pending:
+            future.cancel()
+        self._executor.shutdown(wait=False)
+        super().close()
+
+
+@contextlib.contextmanager
+def open_blob(conn_str, container, blob_name, seekable=False, cache_dir=None):
+    """Yield a blob as a local path or a streaming file object.
+
+    An unchanged blob (same ETag) is served from the local cache without
+    being downloaded. Otherwise it is streamed with parallel ranged GETs and
+    copied into the cache on the way. Pass ``seekable=True`` for formats
+    that cannot be parsed from a stream, such as Parquet; the blob is then
+    downloaded to disk first and a path is yielded.
+    """
+    cache_dir = BLOB_CACHE_DIR if cache_dir is None else cache_dir
+    blob_client = get_blob_client(conn_str, container, blob_name)
+    properties = blob_client.get_blob_properties()
+    cache = BlobCache(cache_dir, BLOB_CACHE_MAX_ENTRIES) if cache_dir else None
+
+    cached_path = cache.lookup(blob_client, properties.etag) if cache else None
+    if cached_path:
+        yield cached_path
+        return
+
+    if cache is None and not seekable:
+        reader = RangedBlobReader(blob_client, properties.size, properties.etag)
+        with io.BufferedReader(reader, buffer_size=BLOB_CHUNK_BYTES) as stream:
+            yield stream
+        return
+
+    staging = (
+        cache.staging_file()
+        if cache
+        else tempfile.NamedTemporaryFile(suffix=".part", delete=False)
+    )
+    try:
+        if seekable:
+            reader = RangedBlobReader(blob_client, properties.size, properties.etag)
+            with staging, reader:
+                shutil.copyfileobj(reader, staging, BLOB_CHUNK_BYTES)
+            yield (
+                cache.commit(blob_client, staging.name, properties.etag)
+                if cache
+                else staging.name
+            )
+        else:
+            reader = RangedBlobReader(
+                blob_client, properties.size, properties.etag, tee=staging
+            )
+            with staging, io.BufferedReader(reader, BLOB_CHUNK_BYTES) as stream:
+                yield stream
+                # Only a blob read to the end is complete enough to cache
+                complete = reader.exhausted
+            if complete:
+                cache.commit(blob_client, staging.name, properties.etag)
+    finally:
+        # Already moved into the cache unless the read failed or was cut short
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(staging.name)
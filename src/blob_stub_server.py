@@ -0,0 +1,196 @@
+"""Local stand-in for Azure Blob Storage, serving files from a directory.
+
+Blobs are read from <root>/<container>/<blob>. Only what the app uses is
+implemented: blob properties, ranged downloads and ETag conditions.
+
+Usage:
+    python src/blob_stub_server.py --root ./blobs --port 10000
+    AZURE_CONNECTION_STRING="$(python src/blob_stub_server.py --print-connection-string)" \
+        AZURE_CONTAINER_NAME=hr streamlit run src/app.py
+"""
+
+import argparse
+import email.utils
+import hashlib
+import json
+import os
+import re
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+# Azurite's well-known development account; the stub does not check the key
+ACCOUNT_NAME = "devstoreaccount1"
+ACCOUNT_KEY = (
+    "Eby8vdM02xNOcqFlqUwJPLlmEtlCDXJ1OUzFT50uSRZ6IFsu"
+    "Fq2UVErCz4I6tq/K1SZFPTOtr/KBHBeksoGMGw=="
+)
+API_VERSION = "2025-01-05"
+RANGE_PATTERN = re.compile(r"bytes=(\d+)-(\d*)")
+
+
+def connection_string(host="127.0.0.1", port=10000):
+    return (
+        f"DefaultEndpointsProtocol=http;AccountName={ACCOUNT_NAME};"
+        f"AccountKey={ACCOUNT_KEY};"
+        f"BlobEndpoint=http://{host}:{port}/{ACCOUNT_NAME};"
+    )
+
+
+class StubState:
+    def __init__(self, root):
+        self.root = root
+        self.requests = 0
+        self.downloads = 0
+        self.bytes_sent = 0
+        self.lock = threading.Lock()
+
+
+def make_handler(state):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _blob_path(self):
+            # /<account>/<container>/<blob...>
+            parts = unquote(urlsplit(self.path).path).strip("/").split("/", 2)
+            if len(parts) < 3 or parts[0] != ACCOUNT_NAME:
+                return None
+            path = os.path.realpath(os.path.join(state.root, parts[1], parts[2]))
+            root = os.path.realpath(state.root)
+            return path if path.startswith(root + os.sep) else None
+
+        def _send(self, status, body=b"", headers=None):
+            self.send_response(status)
+            self.send_header("x-ms-request-id", str(uuid.uuid4()))
+            self.send_header("x-ms-version", API_VERSION)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            if "Content-Length" not in (headers or {}):
+                self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(body)
+                with state.lock:
+                    state.bytes_sent += len(body)
+
+        def _send_error(self, status, code):
+            body = (
+                f'<?xml version="1.0" encoding="utf-8"?>'
+                f"<Error><Code>{code}</Code><Message>{code}</Message></Error>"
+            ).encode()
+            self._send(
+                status,
+                body,
+                {"Content-Type": "application/xml", "x-ms-error-code": code},
+            )
+
+        def do_GET(self):
+            if self.path.rstrip("/") == "/stats":
+                with state.lock:
+                    stats = {
+                        "requests": state.requests,
+                        "downloads": state.downloads,
+                        "bytes_sent": state.bytes_sent,
+                    }
+                self._send(
+                    200,
+                    json.dumps(stats).encode(),
+                    {"Content-Type": "application/json"},
+                )
+                return
+            self._serve_blob()
+
+        def do_HEAD(self):
+            self._serve_blob()
+
+        def _serve_blob(self):
+            with state.lock:
+                state.requests += 1
+            path = self._blob_path()
+            if path is None or not os.path.isfile(path):
+                self._send_error(404, "BlobNotFound")
+                return
+
+            stat = os.stat(path)
+            digest = hashlib.md5(f"{stat.st_mtime_ns}:{stat.st_size}".encode())
+            etag = f'"0x{digest.hexdigest()[:16].upper()}"'
+            headers = {
+                "ETag": etag,
+                "Last-Modified": email.utils.formatdate(stat.st_mtime, usegmt=True),
+                "x-ms-blob-type": "BlockBlob",
+                "Accept-Ranges": "bytes",
+                "Content-Type": "application/octet-stream",
+            }
+            if self.headers.get("If-None-Match") in (etag, "*"):
+                self._send(304, headers=headers)
+                return
+            if_match = self.headers.get("If-Match")
+            if if_match not in (None, etag, "*"):
+                self._send_error(412, "ConditionNotMet")
+                return
+
+            size = stat.st_size
+            if self.command == "HEAD":
+                headers["Content-Length"] = str(size)
+                self._send(200, headers=headers)
+                return
+
+            status, start, end = 200, 0, size - 1
+            requested = self.headers.get("x-ms-range") or self.headers.get("Range")
+            match = RANGE_PATTERN.fullmatch(requested or "")
+            if match:
+                start = int(match.group(1))
+                if start >= size:
+                    headers["Content-Range"] = f"bytes */{size}"
+                    self._send_error(416, "InvalidRange")
+                    return
+                end = min(int(match.group(2) or size - 1), size - 1)
+                status = 206
+                headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+            with open(path, "rb") as f:
+                f.seek(start)
+                body = f.read(end - start + 1)
+            with state.lock:
+                state.downloads += 1
+            self._send(status, body, headers)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def serve(root, host="127.0.0.1", port=10000):
+    """Start the stub server on a background thread and return it"""
+    state = StubState(root)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.state = state
+    server.connection_string = connection_string(host, server.server_address[1])
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Azure Blob Storage stub")
+    parser.add_argument("--root", default=".", help="directory of container folders")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=10000)
+    parser.add_argument("--print-connection-string", action="store_true")
+    args = parser.parse_args()
+
+    if args.print_connection_string:
+        print(connection_string(args.host, args.port))
+        return
+
+    server = serve(args.root, args.host, args.port)
+    print(f"Stub blob endpoint on http://{args.host}:{args.port}/{ACCOUNT_NAME}")
+    print(f"AZURE_CONNECTION_STRING={server.connection_string}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from statsmodels.nonparametric.smoothers_lowess import lowess
+
+sys.path.append(os.path.dirname(__file__))
+from instrumentation import instrumented
+from prediction_cache import prediction_cache
+
+# Above this many employees the scatter shows binned points instead of rows
+SCATTER_MAX_POINTS = int(os.getenv("SCATTER_MAX_POINTS", "5000"))
+# Grid cells per axis used when binning, per department
+SCATTER_BINS = int(os.getenv("SCATTER_BINS", "40"))
+# LOWESS is fitted on at most this many employees per department
+LOWESS_SAMPLE_ROWS = int(os.getenv("LOWESS_SAMPLE_ROWS", "2000"))
+LOWESS_POINTS = 50
+# Same smoothing span Plotly Express uses for trendline="lowess"
+LOWESS_FRAC = 2 / 3
+
+X_COLUMN = "engagement_score"
+Y_COLUMN = "Attrition_Probability"
+
+
+def _binned_points(data, bins):
+    """One point per occupied grid cell per department, at the members' mean"""
+    x_edges = np.linspace(data[X_COLUMN].min(), data[X_COLUMN].max(), bins + 1)
+    cells = pd.DataFrame(
+        {
+            "department": data["department"],
+            "x_bin": np.searchsorted(x_edges[1:-1], data[X_COLUMN], side="right"),
+            # Probabilities are already on [0, 1]
+            "y_bin": np.minimum((data[Y_COLUMN] * bins).astype(int), bins - 1),
+        }
+    )
+    return (
+        data.groupby(
+            [cells["department"], cells["x_bin"], cells["y_bin"]], observed=True
+        )
+        .agg(
+            **{
+                X_COLUMN: (X_COLUMN, "mean"),
+                Y_COLUMN: (Y_COLUMN, "mean"),
+                "employees": (Y_COLUMN, "size"),
+            }
+        )
+        .reset_index(level=["x_bin", "y_bin"], drop=True)
+        .reset_index()
+    )
+
+
+def _trendline(data):
+    """LOWESS of risk on engagement, fitted on a fixed-seed sample"""
+    if len(data) > LOWESS_SAMPLE_ROWS:
+        data = data.sample(LOWESS_SAMPLE_ROWS, random_state=0)
+    x = data[X_COLUMN].to_numpy(dtype=float)
+    xvals = np.linspace(x.min(), x.max(), LOWESS_POINTS)
+    y = lowess(data[Y_COLUMN].to_numpy(dtype=float), x, frac=LOWESS_FRAC, xvals=xvals)
+    return pd.DataFrame({X_COLUMN: xvals, Y_COLUMN: y})
+
+
+@instrumented("engagement_chart_data", rows=lambda chart: len(chart["points"]))
+def compute_engagement_chart_data(pred_df, max_points=None, bins=None):
+    """Points and per-department trendlines for the engagement scatter.
+
+    Returns ``points`` (one row per employee, or per occupied grid cell when
+    there are more than ``max_points`` employees, with an ``employees``
+    count), ``trendlines`` and ``binned``.
+    """
+    max_points = SCATTER_MAX_POINTS if max_points is None else max_points
+    bins = SCATTER_BINS if bins is None else bins
+    data = pred_df[["department", X_COLUMN, Y_COLUMN]].dropna()
+
+    binned = len(data) > max_points
+    if binned:
+        points = _binned_points(data, bins)
+    else:
+        points = data.assign(employees=1)
+
+    trendlines = [
+        _trendline(rows).assign(department=department)
+        for department, rows in data.groupby("department", sort=False, observed=True)
+        if rows[X_COLUMN].nunique() > 1
+    ]
+    trendlines = (
+        pd.concat(trendlines, ignore_index=True)
+        if trendlines
+        else pd.DataFrame(columns=[X_COLUMN, Y_COLUMN, "department"])
+    )
+    return {"points": points, "trendlines": trendlines, "binned": binned}
+
+
+def cached_engagement_chart_data(pred_df):
+    """Engagement chart data, cached next to the predictions it was built from"""
+    cache_key = pred_df.attrs.get("cache_key")
+    if cache_key is None:
+        return compute_engagement_chart_data(pred_df)
+
+    key = f"{cache_key}:engagement:{SCATTER_MAX_POINTS}:{SCATTER_BINS}"
+    chart_data = prediction_cache.get(key)
+    if chart_data is None:
+        chart_data = compute_engagement_chart_data(pred_df)
+        prediction_cache.put(key, chart_data)
+    return chart_data
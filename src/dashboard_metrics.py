@@ -0,0 +1,89 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(__file__))
+from instrumentation import instrumented
+from prediction_cache import prediction_cache
+from utils import HIGH_RISK_LABEL
+
+TENURE_BINS = 5
+
+
+@instrumented(
+    "dashboard_summary", rows=lambda summary: summary["kpis"]["total_employees"]
+)
+def compute_dashboard_summary(pred_df):
+    """All Executive Dashboard rollups from a single grouped pass.
+
+    ``pred_df`` is scanned once into a small department x tenure band x risk
+    band table of counts and sums; every chart and card is then derived
+    from that table, never from the employee frame.
+    """
+    tenure_band = pd.cut(pred_df["tenure"], bins=TENURE_BINS)
+    cube = pred_df.groupby(
+        [pred_df["department"], tenure_band.rename("tenure_band"), "Risk_Label"],
+        observed=True,
+        dropna=False,
+    ).agg(
+        employees=("Attrition_Probability", "size"),
+        risk_sum=("Attrition_Probability", "sum"),
+        engagement_sum=("engagement_score", "sum"),
+        engagement_count=("engagement_score", "count"),
+    )
+
+    def rollup(level):
+        totals = cube.groupby(level=level, observed=True, dropna=False).sum()
+        totals["Attrition_Probability"] = totals["risk_sum"] / totals["employees"]
+        totals["engagement_score"] = (
+            totals["engagement_sum"] / totals["engagement_count"]
+        )
+        return totals
+
+    department = rollup("department")
+    # Employees with no department are in the KPIs but get no card or bar
+    department = department[department.index.notna()].sort_values(
+        "Attrition_Probability", ascending=False
+    )
+    risk = rollup("Risk_Label")["employees"]
+    tenure = rollup("tenure_band")
+    # Employees with no tenure fall outside every band
+    tenure = tenure[tenure.index.notna()]
+
+    totals = cube[["employees", "risk_sum", "engagement_sum", "engagement_count"]].sum()
+    return {
+        "kpis": {
+            "total_employees": int(totals["employees"]),
+            "at_risk_employees": int(risk.get(HIGH_RISK_LABEL, 0)),
+            "avg_risk": totals["risk_sum"] / totals["employees"],
+            "avg_engagement": totals["engagement_sum"] / totals["engagement_count"],
+        },
+        "department": department[
+            ["employees", "Attrition_Probability", "engagement_score"]
+        ].reset_index(),
+        "risk_counts": risk.reindex(pred_df["Risk_Label"].cat.categories, fill_value=0)
+        .rename("count")
+        .rename_axis("Risk_Label")
+        .reset_index(),
+        "tenure": pd.DataFrame(
+            {
+                "tenure": tenure.index.astype(str),
+                "Attrition_Probability": tenure["Attrition_Probability"].to_numpy(),
+            }
+        ),
+    }
+
+
+def cached_dashboard_summary(pred_df):
+    """Dashboard summary, cached next to the predictions it was built from"""
+    cache_key = pred_df.attrs.get("cache_key")
+    if cache_key is None:
+        return compute_dashboard_summary(pred_df)
+
+    key = f"{cache_key}:dashboard"
+    summary = prediction_cache.get(key)
+    if summary is None:
+        summary = compute_dashboard_summary(pred_df)
+        prediction_cache.put(key, summary)
+    return summary
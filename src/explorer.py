@@ -0,0 +1,148 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from functools import cached_property
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(__file__))
+from instrumentation import instrumented
+
+ID_COLUMN = "EmployeeID"
+PAGE_SIZES = [25, 50, 100, 250]
+# Explorer indexes kept for the most recently viewed prediction frames
+EXPLORER_MAX_INDEXES = int(os.getenv("EXPLORER_MAX_INDEXES", "4"))
+
+
+def id_position(ids, employee_id):
+    """Row position of ``employee_id`` in an Index of EmployeeIDs, or None.
+
+    The ID is cast to the index's dtype first, so a search for "1042" finds
+    1042; an ID the dtype cannot hold (40000 once IDs are compacted to
+    int16) is simply not there.
+    """
+    try:
+        key = ids.dtype.type(employee_id)
+    except (TypeError, ValueError, OverflowError):
+        return None
+    positions = ids.get_indexer_for([key])
+    positions = positions[positions >= 0]
+    return int(positions[0]) if len(positions) else None
+
+
+class ExplorerPage:
+    """One page of explorer rows plus the size of the filtered result"""
+
+    def __init__(self, rows, total, page, page_size):
+        self.rows = rows
+        self.total = total
+        self.page = page
+        self.page_size = page_size
+
+    @property
+    def pages(self):
+        return max(1, -(-self.total // self.page_size))
+
+    @property
+    def first_row(self):
+        """1-based number of the first row on the page, 0 when empty"""
+        return self.page * self.page_size + 1 if len(self.rows) else 0
+
+
+class ExplorerIndex:
+    """Read-only query layer over a scored frame for the Employee Risk Explorer.
+
+    Filters, sorts and pages on the server so only the visible rows reach
+    the browser. EmployeeIDs are looked up through a hash index, and each
+    sort order is computed once, on first use, then reused by every page
+    and filter. Safe to share between sessions: the frame is never
+    modified, and two sessions computing the same order at once both get
+    the same result.
+    """
+
+    def __init__(self, pred_df):
+        self.df = pred_df
+        self.ids = pd.Index(pred_df[ID_COLUMN]) if ID_COLUMN in pred_df else None
+        self._orders = {}
+
+    @cached_property
+    def departments(self):
+        return sorted(self.df["department"].dropna().unique().tolist())
+
+    def _order(self, column, ascending):
+        key = (column, ascending)
+        order = self._orders.get(key)
+        if order is None:
+            order = (
+                self.df[column]
+                .reset_index(drop=True)
+                .sort_values(ascending=ascending, kind="stable", na_position="last")
+                .index.to_numpy()
+            )
+            self._orders[key] = order
+        return order
+
+    def _mask(self, departments, risk_labels, probability_range):
+        mask = None
+
+        def narrow(condition):
+            return condition if mask is None else mask & condition
+
+        if departments:
+            mask = narrow(self.df["department"].isin(departments).to_numpy())
+        if risk_labels:
+            mask = narrow(self.df["Risk_Label"].isin(risk_labels).to_numpy())
+        if probability_range is not None:
+            low, high = probability_range
+            probs = self.df["Attrition_Probability"].to_numpy()
+            mask = narrow((probs >= low) & (probs <= high))
+        return mask
+
+    @instrumented("explorer_query", rows=lambda page: page.total)
+    def query(
+        self,
+        departments=None,
+        risk_labels=None,
+        probability_range=None,
+        sort_by="Attrition_Probability",
+        ascending=False,
+        page=0,
+        page_size=PAGE_SIZES[1],
+    ):
+        """One page of the rows matching every given filter, in sort order.
+
+        ``page`` is 0-based and clamped to the last page.
+        """
+        order = self._order(sort_by, ascending)
+        mask = self._mask(departments, risk_labels, probability_range)
+        if mask is not None:
+            order = order[mask[order]]
+        total = len(order)
+        page = min(max(page, 0), max(0, (total - 1) // page_size))
+        positions = order[page * page_size : (page + 1) * page_size]
+        return ExplorerPage(self.df.iloc[positions], total, page, page_size)
+
+    def lookup(self, employee_id):
+        """The employee's row, or None when the ID is not in the frame"""
+        position = None if self.ids is None else id_position(self.ids, employee_id)
+        return None if position is None else self.df.iloc[position]
+
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_explorer_index(pred_df):
+    """ExplorerIndex of ``pred_df``, shared by sessions viewing the same scores"""
+    cache_key = pred_df.attrs.get("cache_key")
+    if cache_key is None:
+        return ExplorerIndex(pred_df)
+    with _indexes_lock:
+        index = _indexes.get(cache_key)
+        if index is None:
+            index = _indexes[cache_key] = ExplorerIndex(pred_df)
+            while len(_indexes) > EXPLORER_MAX_INDEXES:
+                _indexes.popitem(last=False)
+        _indexes.move_to_end(cache_key)
+        return index
@@ -0,0 +1,162 @@
+import os
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+sys.path.append(os.path.dirname(__file__))
+from artifact_store import ForestArrays
+from preprocessing_pipeline import DATE_COLUMNS, NANOSECONDS_PER_DAY, FeatureEngineer
+from utils import get_model, get_preprocessor, score_probabilities
+
+# Batches up to this many rows take the compiled path. sklearn's own
+# predict_proba is faster on large batches, where its per-call overhead no
+# longer matters (see benchmarks/bench_fast_inference.py).
+FAST_PATH_MAX_ROWS = int(os.getenv("FAST_PATH_MAX_ROWS", "256"))
+ISO_DATE_LENGTH = len("YYYY-MM-DD")
+
+
+def _steps(pipeline, expected):
+    steps = [step for _, step in pipeline.steps]
+    if [type(step) for step in steps] != expected:
+        raise TypeError(f"Cannot compile preprocessing step {pipeline}")
+    return steps
+
+
+class CompiledScorer:
+    """The fitted preprocessor and forest as plain NumPy arrays.
+
+    Reproduces FeatureEngineer, the median imputer and scaler of the numeric
+    features, and the imputer and one-hot encoder of the department with
+    array operations only, then walks the forest's exported node arrays.
+    Scores are identical to the sklearn pipeline's, without its per-call
+    validation and dispatch, which dominate for a handful of rows.
+    """
+
+    def __init__(self, preprocessor, model):
+        engineer, transform = _steps(preprocessor, [FeatureEngineer, ColumnTransformer])
+        if transform.remainder != "drop" or [
+            name for name, _, _ in transform.transformers_
+        ] != ["num", "cat"]:
+            raise TypeError(f"Cannot compile column transformer {transform}")
+        (_, numeric, numeric_columns), (_, categorical, categorical_columns) = (
+            transform.transformers_
+        )
+        numeric_imputer, scaler = _steps(numeric, [SimpleImputer, StandardScaler])
+        category_imputer, encoder = _steps(categorical, [SimpleImputer, OneHotEncoder])
+        if encoder.drop is not None or encoder.handle_unknown != "ignore":
+            raise TypeError(f"Cannot compile encoder {encoder}")
+
+        self.engineer = engineer
+        self.numeric_columns = list(numeric_columns)
+        self.medians = numeric_imputer.statistics_.astype(np.float64)
+        self.means = scaler.mean_ if scaler.with_mean else 0.0
+        self.scales = scaler.scale_ if scaler.with_std else 1.0
+        (self.category_column,) = categorical_columns
+        self.category_fill = category_imputer.statistics_[0]
+        self.category_index = {
+            category: i for i, category in enumerate(encoder.categories_[0])
+        }
+        self.n_features = len(self.numeric_columns) + len(self.category_index)
+        self.forest = (
+            model
+            if isinstance(model, ForestArrays)
+            else ForestArrays.from_estimator(model)
+        )
+        if self.forest.n_features_in_ != self.n_features:
+            raise ValueError("Preprocessor output does not match the model input")
+
+    @staticmethod
+    def _column(data, name):
+        values = data[name]
+        if isinstance(values, pd.Series):
+            return values.to_numpy()
+        return np.atleast_1d(np.asarray(values))
+
+    def _dates(self, values):
+        """Dates as datetime64[ns], parsed as FeatureEngineer would"""
+        if np.issubdtype(values.dtype, np.datetime64):
+            return values.astype("datetime64[ns]")
+        values = np.where(pd.isna(values), None, values)
+        # FeatureEngineer reads these as %Y-%m-%d, which NumPy parses natively
+        if all(
+            value is None or (isinstance(value, str) and len(value) == ISO_DATE_LENGTH)
+            for value in values
+        ):
+            try:
+                return values.astype("datetime64[ns]")
+            except ValueError:
+                pass
+        return self.engineer._parse_dates(pd.Series(values))
+
+    def transform(self, data):
+        """Model input for a DataFrame or a dict of equal-length columns"""
+        categories = self._column(data, self.category_column)
+        n_rows = len(categories)
+        X = np.empty((n_rows, self.n_features), dtype=np.float64)
+        engineered = {}
+        reference = self.engineer._reference_timestamp().as_unit("ns").value
+        for column, feature in zip(
+            DATE_COLUMNS, ("employment_age", "years_since_last_promotion")
+        ):
+            dates = self._dates(self._column(data, column))
+            days = (reference - dates.view(np.int64)) // NANOSECONDS_PER_DAY
+            engineered[feature] = np.where(np.isnat(dates), np.nan, days / 365)
+
+        numeric = X[:, : len(self.numeric_columns)]
+        for i, column in enumerate(self.numeric_columns):
+            numeric[:, i] = (
+                engineered[column]
+                if column in engineered
+                else self._column(data, column).astype(np.float64)
+            )
+        missing = np.isnan(numeric)
+        numeric[missing] = np.broadcast_to(self.medians, numeric.shape)[missing]
+        numeric -= self.means
+        numeric /= self.scales
+
+        one_hot = X[:, len(self.numeric_columns) :]
+        one_hot[:] = 0.0
+        # Like SimpleImputer on object columns, only NaN counts as missing;
+        # None is an unknown category and encodes as all zeros
+        codes = np.fromiter(
+            (
+                self.category_index.get(
+                    self.category_fill if value != value else value, -1
+                )
+                for value in categories
+            ),
+            dtype=np.intp,
+            count=n_rows,
+        )
+        known = codes >= 0
+        one_hot[np.flatnonzero(known), codes[known]] = 1.0
+        return X
+
+    def score(self, data):
+        """Positive-class probabilities, as score_probabilities returns them"""
+        return self.forest.predict_proba(self.transform(data))[:, 1]
+
+
+_compiled = None
+_compiled_lock = threading.Lock()
+
+
+def get_compiled_scorer():
+    """CompiledScorer of the loaded artifacts, built on first use"""
+    global _compiled
+    with _compiled_lock:
+        if _compiled is None:
+            _compiled = CompiledScorer(get_preprocessor(), get_model())
+        return _compiled
+
+
+def fast_score_probabilities(df):
+    """score_probabilities, taking the compiled path for small batches"""
+    if len(df) <= FAST_PATH_MAX_ROWS:
+        return get_compiled_scorer().score(df)
+    return score_probabilities(df)
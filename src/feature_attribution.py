@@ -0,0 +1,225 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+sys.path.append(os.path.dirname(__file__))
+from artifact_store import ForestArrays
+from explorer import id_position
+from instrumentation import instrumented
+from preprocessing_pipeline import ENGINEERED_FEATURES
+from utils import get_model, get_preprocessor
+
+ID_COLUMN = "EmployeeID"
+# Drivers listed in the detail view and sent with each prompt
+ATTRIBUTION_TOP_DRIVERS = int(os.getenv("ATTRIBUTION_TOP_DRIVERS", "3"))
+# Rows transformed and traversed at a time; bounds the (rows x trees) leaf ids
+ATTRIBUTION_BLOCK_ROWS = int(os.getenv("ATTRIBUTION_BLOCK_ROWS", "16384"))
+# Attributions kept for the most recently viewed prediction frames
+ATTRIBUTION_MAX_ENTRIES = int(os.getenv("ATTRIBUTION_MAX_ENTRIES", "4"))
+
+
+def _feature_groups(transform):
+    """Input feature of every column of the transformed matrix.
+
+    One-hot columns all belong to the feature they encode, so a department
+    is credited as a whole rather than as one indicator per department.
+    """
+    groups = []
+    for _, pipeline, columns in transform.transformers_:
+        if pipeline == "drop":
+            continue
+        names = pipeline.get_feature_names_out(columns)
+        if len(columns) == len(names):
+            groups += list(columns)
+        else:
+            (column,) = columns
+            groups += [column] * len(names)
+    return groups
+
+
+class ForestExplainer:
+    """Per-row feature contributions to the forest's attrition probability.
+
+    Decomposes every tree's prediction along the path the row takes: each
+    split moves the positive-class fraction from the parent's to the
+    child's, and that change is credited to the feature split on. The sum
+    of a path's changes is precomputed once per leaf, so explaining a batch
+    is one traversal plus a sparse product of leaf indicators with the leaf
+    table. ``bias`` plus a row's contributions equals its probability.
+    """
+
+    def __init__(self, preprocessor, model):
+        self.preprocessor = preprocessor
+        self.model = model
+        groups = _feature_groups(preprocessor.named_steps["transform"])
+        self.features = list(dict.fromkeys(groups))
+        group_of = np.array([self.features.index(group) for group in groups])
+
+        forest = (
+            model
+            if isinstance(model, ForestArrays)
+            else ForestArrays.from_estimator(model)
+        )
+        self.forest = forest
+        positive = np.asarray(forest.value)[:, -1]
+        self.bias = float(positive[forest.roots].mean())
+
+        # Contributions accumulated from the root down to every node, one
+        # tree level at a time; children always have higher ids than parents
+        paths = np.zeros((len(positive), len(self.features)))
+        frontier = np.asarray(forest.roots)
+        while len(frontier):
+            parents = frontier[forest.children_left[frontier] != frontier]
+            split_on = group_of[forest.feature[parents]]
+            frontier = []
+            for children in (
+                forest.children_left[parents],
+                forest.children_right[parents],
+            ):
+                paths[children] = paths[parents]
+                paths[children, split_on] += positive[children] - positive[parents]
+                frontier.append(children)
+            frontier = np.concatenate(frontier)
+        self.leaf_contributions = paths / forest.n_estimators
+
+    def _leaves(self, X):
+        if isinstance(self.model, ForestArrays):
+            return self.model.apply(X)
+        # scikit-learn numbers nodes per tree; shift them into the flat arrays
+        return self.model.apply(X) + self.forest.roots
+
+    def contributions(self, X):
+        """Contributions of every feature for the rows of a transformed matrix"""
+        leaves = self._leaves(X)
+        n_rows, n_trees = leaves.shape
+        on_path = sparse.csr_matrix(
+            (
+                np.ones(leaves.size),
+                leaves.ravel(),
+                np.arange(0, leaves.size + 1, n_trees),
+            ),
+            shape=(n_rows, len(self.leaf_contributions)),
+        )
+        return (on_path @ self.leaf_contributions).astype(np.float32)
+
+    def explain(self, df):
+        """FeatureAttributions of a frame holding the model's input columns"""
+        engineer = self.preprocessor.named_steps["feature_engineering"]
+        transform = self.preprocessor.named_steps["transform"]
+        contributions = np.empty((len(df), len(self.features)), dtype=np.float32)
+        engineered = {
+            feature: np.empty(len(df), dtype=np.float32)
+            for feature in ENGINEERED_FEATURES
+        }
+        for start in range(0, len(df), ATTRIBUTION_BLOCK_ROWS):
+            block = slice(start, start + ATTRIBUTION_BLOCK_ROWS)
+            features = engineer.transform(df.iloc[block])
+            for feature, values in engineered.items():
+                values[block] = features[feature].to_numpy()
+            contributions[block] = self.contributions(transform.transform(features))
+        return FeatureAttributions(
+            df, self.features, self.bias, contributions, engineered
+        )
+
+
+class FeatureAttributions:
+    """Precomputed contributions of every row of a scored frame.
+
+    Rows are found through a hash index on EmployeeID, and ranking one
+    employee's drivers only sorts that row's handful of features.
+    """
+
+    def __init__(self, frame, features, bias, contributions, engineered):
+        self.frame = frame
+        self.features = features
+        self.bias = bias
+        self.contributions = contributions
+        self.engineered = engineered
+        self.ids = pd.Index(frame[ID_COLUMN]) if ID_COLUMN in frame else None
+
+    @property
+    def nbytes(self):
+        return self.contributions.nbytes + sum(
+            values.nbytes for values in self.engineered.values()
+        )
+
+    def position(self, employee_id):
+        """Row position of the employee, or None when the ID is not scored"""
+        return None if self.ids is None else id_position(self.ids, employee_id)
+
+    def drivers_at(self, position, count=None):
+        """Largest contributions of the row at ``position``, strongest first.
+
+        Each driver is a dict of the feature, the employee's value of it
+        and its contribution to the probability.
+        """
+        count = ATTRIBUTION_TOP_DRIVERS if count is None else count
+        row = self.contributions[position]
+        drivers = []
+        for i in np.argsort(-np.abs(row), kind="stable")[:count]:
+            feature = self.features[i]
+            if feature in self.engineered:
+                value = round(float(self.engineered[feature][position]), 1)
+            else:
+                value = self.frame[feature].iloc[position]
+            if isinstance(value, np.generic):
+                value = value.item()
+            drivers.append(
+                {
+                    "feature": feature,
+                    "value": None if pd.isna(value) else value,
+                    "contribution": float(row[i]),
+                }
+            )
+        return drivers
+
+    def drivers(self, employee_id, count=None):
+        """Top drivers of an employee by ID; empty when the ID is not scored"""
+        position = self.position(employee_id)
+        return [] if position is None else self.drivers_at(position, count)
+
+
+_explainer = None
+_explainer_lock = threading.Lock()
+
+
+def get_explainer():
+    """ForestExplainer of the loaded artifacts, built on first use"""
+    global _explainer
+    with _explainer_lock:
+        if _explainer is None:
+            _explainer = ForestExplainer(get_preprocessor(), get_model())
+        return _explainer
+
+
+@instrumented("feature_attribution", rows=lambda result: len(result.contributions))
+def explain_predictions(pred_df):
+    return get_explainer().explain(pred_df)
+
+
+_attributions = OrderedDict()
+_attributions_lock = threading.Lock()
+
+
+def get_attributions(pred_df):
+    """FeatureAttributions of ``pred_df``, shared by sessions viewing it.
+
+    Computed once per prediction frame, right after it is scored, and kept
+    for the most recent ATTRIBUTION_MAX_ENTRIES frames.
+    """
+    cache_key = pred_df.attrs.get("cache_key")
+    if cache_key is None:
+        return explain_predictions(pred_df)
+    with _attributions_lock:
+        attributions = _attributions.get(cache_key)
+        if attributions is None:
+            attributions = _attributions[cache_key] = explain_predictions(pred_df)
+            while len(_attributions) > ATTRIBUTION_MAX_ENTRIES:
+                _attributions.popitem(last=False)
+        _attributions.move_to_end(cache_key)
+        return attributions
@@ -0,0 +1,204 @@
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.append(os.path.dirname(__file__))
+from artifact_store import ForestArrays, artifact_fingerprint
+from instrumentation import increment, instrumented
+from preprocessing_pipeline import INPUT_COLUMNS
+from utils import (
+    MODEL_PATH,
+    PREPROCESSOR_PATH,
+    add_risk_columns,
+    get_model,
+    get_preprocessor,
+    predict_attrition,
+)
+
+# Probabilities of the last scored snapshot, per EmployeeID; "" disables
+SCORE_STORE_PATH = os.getenv(
+    "SCORE_STORE_PATH",
+    os.path.join(os.path.dirname(__file__), ".cache", "scores.parquet"),
+)
+ID_COLUMN = "EmployeeID"
+
+# A score can be reused at two levels:
+#
+# 1. The employee's input columns hash the same and they were scored today.
+#    The engineered features are measured against today, so the model input
+#    is then exactly the same and the row skips the preprocessor as well.
+# 2. Otherwise the row is preprocessed and its "decision signature" compared.
+#    A tree only asks whether a feature is <= a split threshold, so two
+#    inputs that fall between the same thresholds on every feature reach
+#    the same leaves and get the same probability. This is what lets
+#    yesterday's scores survive the daily drift of the date features: only
+#    employees whose tenure or promotion age crossed a split are re-scored.
+
+
+def split_thresholds(model):
+    """Sorted split thresholds of each input feature, or None if not a forest"""
+    if isinstance(model, ForestArrays):
+        internal = model.children_left != np.arange(len(model.children_left))
+        features, thresholds = model.feature[internal], model.threshold[internal]
+    elif hasattr(model, "estimators_") and hasattr(model.estimators_[0], "tree_"):
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        internal = [tree.children_left >= 0 for tree in trees]
+        features = np.concatenate([t.feature[i] for t, i in zip(trees, internal)])
+        thresholds = np.concatenate([t.threshold[i] for t, i in zip(trees, internal)])
+    else:
+        return None
+    return [
+        np.unique(thresholds[features == feature])
+        for feature in range(model.n_features_in_)
+    ]
+
+
+def decision_signature(X, thresholds):
+    """Per-row hash of which side of every split threshold the row falls on.
+
+    Without thresholds (a model that is not a tree ensemble), the hash is
+    of the model input itself.
+    """
+    # Trees compare the float32 input against float64 thresholds
+    X = np.asarray(X, dtype=np.float32)
+    if thresholds is None:
+        return pd.util.hash_pandas_object(pd.DataFrame(X), index=False).to_numpy()
+
+    bins = np.empty(X.shape, dtype=np.int32)
+    for feature, feature_thresholds in enumerate(thresholds):
+        column = X[:, feature].astype(np.float64)
+        bins[:, feature] = np.searchsorted(feature_thresholds, column, side="left")
+        # Missing values take their own branch, unlike any bin
+        bins[np.isnan(column), feature] = -1
+    return pd.util.hash_pandas_object(pd.DataFrame(bins), index=False).to_numpy()
+
+
+class ScoreStore:
+    """Parquet file of the last snapshot's row hashes and probabilities"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self, artifacts):
+        """Stored scores if they came from the same ``artifacts``, else None.
+
+        ``attrs["scored_on"]`` holds the date the scores were computed.
+        """
+        if not os.path.exists(self.path):
+            return None
+        table = pq.read_table(self.path)
+        meta = json.loads(table.schema.metadata[b"scoring"])
+        if meta["artifacts"] != artifacts:
+            return None
+        scores = table.to_pandas()
+        scores.attrs["scored_on"] = meta["scored_on"]
+        return scores
+
+    def save(self, scores, artifacts, scored_on):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        meta = {"artifacts": artifacts, "scored_on": scored_on}
+        table = pa.Table.from_pandas(scores, preserve_index=False)
+        table = table.replace_schema_metadata({"scoring": json.dumps(meta)})
+        # Written aside and moved into place, so readers never see half a file
+        fd, staging = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(self.path)), suffix=".part"
+        )
+        os.close(fd)
+        pq.write_table(table, staging)
+        os.replace(staging, self.path)
+
+
+def incremental_score_probabilities(df, store):
+    """Attrition probabilities of ``df``, re-scoring only changed employees.
+
+    Returns the probabilities and the number of rows sent to the model. The
+    result is identical to scoring every row.
+    """
+    artifacts = {
+        "model": artifact_fingerprint(MODEL_PATH),
+        "preprocessor": artifact_fingerprint(PREPROCESSOR_PATH),
+    }
+    today = pd.Timestamp("today").strftime("%Y-%m-%d")
+    inputs = df[df.columns.intersection(INPUT_COLUMNS, sort=False)]
+    row_hash = pd.util.hash_pandas_object(inputs, index=False).to_numpy()
+
+    previous = store.load(artifacts)
+    n_rows = len(df)
+    probs = np.full(n_rows, np.nan)
+    signature = np.zeros(n_rows, dtype=np.uint64)
+    if previous is None:
+        known = unchanged = np.zeros(n_rows, dtype=bool)
+    else:
+        # Previous values aligned to this snapshot's rows
+        position = pd.Index(previous[ID_COLUMN]).get_indexer(df[ID_COLUMN])
+        known = position >= 0
+        last = {
+            column: np.where(known, previous[column].to_numpy()[position], 0)
+            for column in ("row_hash", "signature", "Attrition_Probability")
+        }
+        unchanged = known & (last["row_hash"] == row_hash)
+        if previous.attrs["scored_on"] != today:
+            unchanged[:] = False
+        probs[unchanged] = last["Attrition_Probability"][unchanged]
+        signature[unchanged] = last["signature"][unchanged]
+
+    pending = np.flatnonzero(~unchanged)
+    rescore = pending
+    if len(pending):
+        model = get_model()
+        X = get_preprocessor().transform(df.iloc[pending])
+        signature[pending] = decision_signature(X, split_thresholds(model))
+        same_leaves = known[pending]
+        if previous is not None:
+            same_leaves &= last["signature"][pending] == signature[pending]
+            reused = pending[same_leaves]
+            probs[reused] = last["Attrition_Probability"][reused]
+        rescore = pending[~same_leaves]
+        if len(rescore):
+            probs[rescore] = model.predict_proba(X[~same_leaves])[:, 1]
+
+    store.save(
+        pd.DataFrame(
+            {
+                ID_COLUMN: df[ID_COLUMN].to_numpy(),
+                "row_hash": row_hash,
+                "signature": signature,
+                "Attrition_Probability": probs,
+            }
+        ),
+        artifacts,
+        today,
+    )
+    return probs, len(rescore)
+
+
+@instrumented("incremental_predict_attrition", rows=len)
+def incremental_predict_attrition(df, store_path=None):
+    """predict_attrition that only re-scores employees changed since last run.
+
+    Falls back to a full re-score when there is no store or the employees
+    cannot be told apart by EmployeeID. ``attrs["rescored_rows"]`` holds the
+    number of rows that went through the model.
+    """
+    store_path = SCORE_STORE_PATH if store_path is None else store_path
+    if (
+        not store_path
+        or ID_COLUMN not in df.columns
+        or not df[ID_COLUMN].is_unique
+        or df[ID_COLUMN].isna().any()
+    ):
+        pred_df = predict_attrition(df)
+        pred_df.attrs["rescored_rows"] = len(df)
+        return pred_df
+
+    probs, rescored = incremental_score_probabilities(df, ScoreStore(store_path))
+    increment("rescored_rows", rescored)
+    pred_df = add_risk_columns(df, probs)
+    pred_df.attrs["rescored_rows"] = rescored
+    return pred_df
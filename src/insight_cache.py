@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+INSIGHT_CACHE_PATH = os.getenv(
+    "INSIGHT_CACHE_PATH",
+    os.path.join(os.path.dirname(__file__), ".cache", "insights.sqlite"),
+)
+INSIGHT_CACHE_TTL = float(os.getenv("INSIGHT_CACHE_TTL_HOURS", "168")) * 3600
+INSIGHT_CACHE_MAX_ENTRIES = int(os.getenv("INSIGHT_CACHE_MAX_ENTRIES", "10000"))
+
+SECTIONS = ("diagnostic", "prescriptive", "preventive")
+
+
+def insight_key(prompt, model, params):
+    """Hash of the prompt with whitespace normalized, the model and sampling"""
+    normalized = " ".join(prompt.split())
+    payload = json.dumps([normalized, model, params], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class InsightCache:
+    """SQLite store of parsed insight sections with TTL and size-based eviction"""
+
+    def __init__(self, path, ttl=INSIGHT_CACHE_TTL, max_entries=10000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            # WAL lets several app processes read while one writes
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS insights ("
+                " key TEXT PRIMARY KEY,"
+                " diagnostic TEXT, prescriptive TEXT, preventive TEXT,"
+                " created_at REAL, last_used REAL)"
+            )
+
+    def get(self, key):
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT diagnostic, prescriptive, preventive FROM insights"
+                " WHERE key = ? AND created_at >= ?",
+                (key, now - self.ttl),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE insights SET last_used = ? WHERE key = ?", (now, key)
+            )
+            self.hits += 1
+        return dict(zip(SECTIONS, row))
+
+    def put(self, key, insights):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO insights VALUES (?, ?, ?, ?, ?, ?)",
+                (key, *(insights[section] for section in SECTIONS), now, now),
+            )
+            self._conn.execute(
+                "DELETE FROM insights WHERE created_at < ?", (now - self.ttl,)
+            )
+            entries = self._conn.execute("SELECT COUNT(*) FROM insights").fetchone()
+            if entries[0] > self.max_entries:
+                # Keep only the most recently used entries
+                self._conn.execute(
+                    "DELETE FROM insights WHERE key NOT IN ("
+                    " SELECT key FROM insights ORDER BY last_used DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM insights").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM insights")
+        self.hits = self.misses = 0
+
+
+_insight_cache = None
+_insight_cache_lock = threading.Lock()
+
+
+def get_insight_cache():
+    """Process-wide insight cache, opened on first use"""
+    global _insight_cache
+    with _insight_cache_lock:
+        if _insight_cache is None:
+            _insight_cache = InsightCache(
+                INSIGHT_CACHE_PATH,
+                ttl=INSIGHT_CACHE_TTL,
+                max_entries=INSIGHT_CACHE_MAX_ENTRIES,
+            )
+        return _insight_cache
@@ -0,0 +1,283 @@
+"""Per-stage timings, memory deltas and counters for the dashboard pipeline.
+
+Wrap a function with ``@instrumented("stage")`` or a block with
+``with stage("stage"):``. Every call records its duration, the change in
+the process's resident memory and the rows it handled. Stats are kept
+for the whole process and shown in the app's admin diagnostics panel.
+
+Optional exports:
+    INSTRUMENTATION_LOG=stderr|<path>   one JSON line per stage call
+    INSTRUMENTATION_PROMETHEUS_FILE=<path>
+        Prometheus text format, rewritten after every call, for the
+        node_exporter textfile collector
+"""
+
+import functools
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+INSTRUMENTATION_LOG = os.getenv("INSTRUMENTATION_LOG", "")
+INSTRUMENTATION_PROMETHEUS_FILE = os.getenv("INSTRUMENTATION_PROMETHEUS_FILE", "")
+# Stage calls kept for the diagnostics panel
+RECENT_EVENTS = int(os.getenv("INSTRUMENTATION_RECENT_EVENTS", "200"))
+METRIC_PREFIX = "attrition"
+
+logger = logging.getLogger("attrition.instrumentation")
+
+
+def rss_bytes():
+    """Resident memory of this process, or None where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+class StageRecord:
+    """One call of a stage; ``rows`` and ``count()`` may be set inside it"""
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = None
+        self.counters = {}
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+
+class Instrumentation:
+    """Thread-safe stats of every stage and counter in the process"""
+
+    def __init__(self, recent_events=RECENT_EVENTS):
+        self._stages = {}
+        self._counters = {}
+        self._events = deque(maxlen=recent_events)
+        self._lock = threading.Lock()
+
+    def record(self, record, seconds, memory_delta, error):
+        event = {
+            "time": round(time.time(), 3),
+            "stage": record.name,
+            "seconds": round(seconds, 6),
+            "memory_delta_mb": (
+                None if memory_delta is None else round(memory_delta / 1024**2, 2)
+            ),
+            "rows": record.rows,
+            "error": error,
+            **({"counters": record.counters} if record.counters else {}),
+        }
+        with self._lock:
+            stats = self._stages.setdefault(
+                record.name,
+                {
+                    "calls": 0,
+                    "errors": 0,
+                    "rows": 0,
+                    "seconds_total": 0.0,
+                    "seconds_last": 0.0,
+                    "seconds_max": 0.0,
+                    "memory_delta_last": None,
+                    "memory_delta_max": None,
+                },
+            )
+            stats["calls"] += 1
+            stats["errors"] += error is not None
+            stats["rows"] += record.rows or 0
+            stats["seconds_total"] += seconds
+            stats["seconds_last"] = seconds
+            stats["seconds_max"] = max(stats["seconds_max"], seconds)
+            if memory_delta is not None:
+                stats["memory_delta_last"] = memory_delta
+                if (
+                    stats["memory_delta_max"] is None
+                    or memory_delta > stats["memory_delta_max"]
+                ):
+                    stats["memory_delta_max"] = memory_delta
+            for name, value in record.counters.items():
+                self._count(f"{record.name}_{name}", value)
+            self._events.append(event)
+        return event
+
+    def _count(self, name, value):
+        self._counters[name] = self._counters.get(name, 0) + value
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self._count(name, value)
+
+    def stages(self):
+        """Stats per stage, with times in seconds and memory in MB"""
+        with self._lock:
+            stages = {name: dict(stats) for name, stats in self._stages.items()}
+        for stats in stages.values():
+            stats["seconds_mean"] = stats["seconds_total"] / stats["calls"]
+            for key in ("memory_delta_last", "memory_delta_max"):
+                value = stats.pop(key)
+                stats[key.replace("delta", "delta_mb")] = (
+                    None if value is None else value / 1024**2
+                )
+        return stages
+
+    def counters(self):
+        with self._lock:
+            return dict(self._counters)
+
+    def events(self):
+        """Most recent stage calls, newest last"""
+        with self._lock:
+            return list(self._events)
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+            self._events.clear()
+
+    def prometheus_text(self):
+        """All stats in the Prometheus text exposition format"""
+        with self._lock:
+            stages = {name: dict(stats) for name, stats in self._stages.items()}
+            counters = dict(self._counters)
+        metrics = [
+            ("stage_calls_total", "counter", "Calls of each stage", "calls"),
+            ("stage_errors_total", "counter", "Calls that raised", "errors"),
+            ("stage_rows_total", "counter", "Rows handled", "rows"),
+            ("stage_seconds_total", "counter", "Time spent", "seconds_total"),
+            (
+                "stage_last_seconds",
+                "gauge",
+                "Duration of the last call",
+                "seconds_last",
+            ),
+            ("stage_max_seconds", "gauge", "Longest call", "seconds_max"),
+            (
+                "stage_last_memory_delta_bytes",
+                "gauge",
+                "Resident memory change over the last call",
+                "memory_delta_last",
+            ),
+        ]
+        lines = []
+        for metric, kind, help_text, key in metrics:
+            name = f"{METRIC_PREFIX}_{metric}"
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            lines += [
+                f'{name}{{stage="{stage}"}} {stats[key]}'
+                for stage, stats in sorted(stages.items())
+                if stats[key] is not None
+            ]
+        name = f"{METRIC_PREFIX}_events_total"
+        lines += [f"# HELP {name} Event counters", f"# TYPE {name} counter"]
+        lines += [
+            f'{name}{{event="{counter}"}} {value}'
+            for counter, value in sorted(counters.items())
+        ]
+        resident = rss_bytes()
+        if resident is not None:
+            name = f"{METRIC_PREFIX}_resident_memory_bytes"
+            lines += [
+                f"# HELP {name} Resident memory of the process",
+                f"# TYPE {name} gauge",
+                f"{name} {resident}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+instrumentation = Instrumentation()
+
+
+def _configure_log(target):
+    if not target or logger.handlers:
+        return
+    handler = (
+        logging.StreamHandler()
+        if target == "stderr"
+        else logging.FileHandler(target, encoding="utf-8")
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+_configure_log(INSTRUMENTATION_LOG)
+
+
+def write_prometheus_file(path):
+    """Atomically replace ``path`` with the current stats"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, staging = tempfile.mkstemp(dir=directory, suffix=".part")
+    with os.fdopen(fd, "w") as f:
+        f.write(instrumentation.prometheus_text())
+    os.replace(staging, path)
+
+
+def _export(event):
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps(event))
+    if INSTRUMENTATION_PROMETHEUS_FILE:
+        try:
+            write_prometheus_file(INSTRUMENTATION_PROMETHEUS_FILE)
+        except OSError:
+            logger.exception("Could not write %s", INSTRUMENTATION_PROMETHEUS_FILE)
+
+
+@contextmanager
+def stage(name):
+    """Time the block as one call of stage ``name``; yields its StageRecord.
+
+    Memory deltas are of the whole process, so with concurrent sessions
+    they include other threads' allocations. Control flow exceptions such
+    as Streamlit's stop and rerun are not counted as errors.
+    """
+    record = StageRecord(name)
+    memory_before = rss_bytes()
+    start = time.perf_counter()
+    error = None
+    try:
+        yield record
+    except Exception as e:
+        error = type(e).__name__
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        memory_after = rss_bytes()
+        memory_delta = (
+            None
+            if memory_before is None or memory_after is None
+            else memory_after - memory_before
+        )
+        _export(instrumentation.record(record, seconds, memory_delta, error))
+
+
+def instrumented(name, rows=None):
+    """Decorator recording each call as stage ``name``.
+
+    ``rows(result)`` gives the number of rows a call handled; results of
+    None are not counted.
+    """
+
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name) as record:
+                result = func(*args, **kwargs)
+                if rows is not None and result is not None:
+                    record.rows = int(rows(result))
+                return result
+
+        return wrapper
+
+    return decorate
+
+
+def increment(name, value=1):
+    """Add to a process-wide event counter"""
+    instrumentation.increment(name, value)
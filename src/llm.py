@@ -1,62 +1,71 @@
-from openai import OpenAI
 from dotenv import load_dotenv
 
-# import os
-import re
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import pandas as pd
 import streamlit as st
+from insight_cache import get_insight_cache, insight_key
+from instrumentation import increment, stage
+from utils import record_startup_timing, risk_label
 
 load_dotenv()
 
-# Initialize DeepSeek client
-client = OpenAI(
-    # api_key=os.getenv("DEEPSEEK_API_KEY") # uncomment to run locally using .env file
-    api_key=st.secrets["DEEPSEEK_API_KEY"],
-    base_url="https://api.deepseek.com/v1",
-)
+# Point DEEPSEEK_BASE_URL at llm_stub_server.py to run without the real API
+DEEPSEEK_BASE_URL = os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com/v1")
+LLM_MODEL = "deepseek-chat"
+SAMPLING_PARAMS = {"temperature": 0.3, "max_tokens": 500, "top_p": 0.9}
 
+# Profile fields sent to the model, most important first. IDs, risk columns
+# and any extra columns of the upload are left out.
+PROFILE_FIELDS = [
+    "department",
+    "tenure",
+    "engagement_score",
+    "job_satisfaction",
+    "work_life_balance_score",
+    "overtime_hours",
+    "working_hours_per_month",
+    "kpi_score",
+    "salary",
+    "number_of_projects",
+    "trainings_and_certifications",
+    "last_promotion_date",
+    "hire_date",
+    "distance_from_home",
+]
+# Estimated tokens allowed for one prompt, system prompt included; profile
+# fields are dropped from the end of PROFILE_FIELDS to stay within it
+LLM_PROMPT_TOKEN_BUDGET = int(os.getenv("LLM_PROMPT_TOKEN_BUDGET", "600"))
+# Characters per token of the English and numbers in these prompts; errs
+# towards overestimating
+CHARS_PER_TOKEN = 3
 
-def generate_insights(employee_row):
-    # Extract key metrics with proper formatting
-    risk_level = (
-        "High Risk"
-        if employee_row.get("Attrition_Probability", 0) > 0.6
-        else "Low Risk"
-    )
-
-    # Build detailed employee profile string
-    profile = "\n".join(
-        [
-            f"- **{key.replace('_', ' ').title()}**: {value}"
-            for key, value in employee_row.items()
-            if key
-            not in ["EmployeeID", "Risk_Label", "Risk_Flag"]  # Exclude redundant fields
-        ]
-    )
-
-    prompt = f"""
-## Role
-You are an HR analytics specialist analyzing employee retention risks. 
-Generate data-driven insights for this employee classified as **{risk_level}**.
-
-## Employee Profile
-{profile}
+# Identical in every request, so the provider can serve it from its prompt
+# cache; everything specific to the employee follows in the user message
+SYSTEM_PROMPT = """You are an HR analytics specialist analyzing employee retention risks.
+Each message gives one employee's risk level, profile as field=value pairs and,
+when available, the key risk drivers of the attrition model's score in
+percentage points.
 
-## Task
 Provide three insights in markdown format:
 1. **DIAGNOSTIC**: Identify key retention factors based on SPECIFIC data points
 2. **PRESCRIPTIVE**: Recommend personalized retention actions in bullet points
 3. **PREVENTIVE**: Suggest one scalable policy for similar employees
 
-## Rules
+Rules:
 - For LOW RISK employees: Focus on strengthening retention factors
 - For HIGH RISK employees: Focus on mitigating attrition risks
-- Reference ACTUAL METRICS from the profile (e.g., "Job Satisfaction: 3")
+- Reference ACTUAL METRICS from the profile in plain words (e.g., **Job Satisfaction: 3**)
 - Provide CONCRETE action items, not generic advice
-- Consider: Engagement, Compensation, Workload, Development, Work-Life Balance
+- Base the DIAGNOSTIC on the key risk drivers first when they are given; otherwise
+  consider Engagement, Compensation, Workload, Development, Work-Life Balance
 - Use **bold** for metric references
 - Output MUST contain exactly 3 sections with headers
 
-## Output Format EXACTLY:
+Output Format EXACTLY:
 ### Diagnostic Insight
 [Concise analysis with data references]
 
@@ -66,63 +75,417 @@ Provide three insights in markdown format:
 - [Action 3]
 
 ### Preventive Strategy
-[One policy suggestion]
-"""
+[One policy suggestion]"""
+
+# Cohort generation: concurrent requests and retry policy for 429s/5xx
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+LLM_BACKOFF_BASE = 1.0
+LLM_BACKOFF_MAX = 30.0
+
+# The DeepSeek client is created on first use and shared by all sessions
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            start = time.perf_counter()
+            from openai import OpenAI
+
+            _client = OpenAI(
+                # DEEPSEEK_API_KEY in the environment (e.g. a local .env file)
+                # takes precedence over Streamlit secrets
+                api_key=os.getenv("DEEPSEEK_API_KEY") or st.secrets["DEEPSEEK_API_KEY"],
+                base_url=DEEPSEEK_BASE_URL,
+                # Retries are handled by _complete_with_retry
+                max_retries=0,
+            )
+            record_startup_timing("llm_client", time.perf_counter() - start)
+        return _client
 
+
+def _retry_delay(error, attempt):
+    """Seconds to wait before retrying, honouring the server's Retry-After"""
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
     try:
-        response = client.chat.completions.create(
-            model="deepseek-chat",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
-            max_tokens=500,
-            top_p=0.9,
+        return min(float(retry_after), LLM_BACKOFF_MAX)
+    except (TypeError, ValueError):
+        # Exponential backoff with full jitter
+        return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2**attempt))
+
+
+def _complete_with_retry(messages, stream=False):
+    """Run one chat completion, retrying rate limits and transient failures"""
+    from openai import (
+        APIConnectionError,
+        APITimeoutError,
+        InternalServerError,
+        RateLimitError,
+    )
+
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        try:
+            return get_client().chat.completions.create(
+                model=LLM_MODEL,
+                messages=messages,
+                stream=stream,
+                # The last streamed chunk then carries the token usage
+                **({"stream_options": {"include_usage": True}} if stream else {}),
+                **SAMPLING_PARAMS,
+            )
+        except (
+            RateLimitError,
+            APITimeoutError,
+            APIConnectionError,
+            InternalServerError,
+        ) as e:
+            if attempt == LLM_MAX_RETRIES:
+                raise
+            increment("llm_retries")
+            time.sleep(_retry_delay(e, attempt))
+
+
+def estimate_tokens(text):
+    """Approximate token count of ``text``, without loading a tokenizer"""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _record_usage(record, usage):
+    """Add a response's token usage to the stage record of its call"""
+    if usage is None:
+        return
+    record.count("prompt_tokens", usage.prompt_tokens or 0)
+    record.count("completion_tokens", usage.completion_tokens or 0)
+    # DeepSeek reports prompt cache hits at the top level, OpenAI in details
+    cached = getattr(usage, "prompt_cache_hit_tokens", None)
+    if cached is None:
+        cached = getattr(usage.prompt_tokens_details, "cached_tokens", None)
+    if cached is not None:
+        record.count("cached_prompt_tokens", cached)
+
+
+def format_drivers(drivers):
+    """Markdown bullets of an employee's attribution drivers, strongest first"""
+    lines = []
+    for driver in drivers:
+        value = "missing" if driver["value"] is None else driver["value"]
+        points = driver["contribution"] * 100
+        lines.append(
+            f"- **{driver['feature'].replace('_', ' ').title()}** ({value}): "
+            f"{'raises' if points > 0 else 'lowers'} risk by {abs(points):.1f} pts"
         )
+    return "\n".join(lines)
 
-        raw_text = response.choices[0].message.content.strip()
 
-        # Robust parsing using regex
-        insights = {"diagnostic": "", "prescriptive": "", "preventive": ""}
+def _compact_value(value):
+    # pd.isna rather than value != value, which raises for pd.NA
+    if pd.api.types.is_scalar(value) and pd.isna(value):
+        return "n/a"
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else str(round(value, 2))
+    if hasattr(value, "strftime"):
+        return value.strftime("%Y-%m-%d")
+    return str(value)
 
-        patterns = {
-            "diagnostic": r"### Diagnostic Insight\n+(.*?)(?=\n### Prescriptive Actions|$)",
-            "prescriptive": r"### Prescriptive Actions\n+(.*?)(?=\n### Preventive Strategy|$)",
-            "preventive": r"### Preventive Strategy\n+(.*)",
-        }
 
-        for key, pattern in patterns.items():
-            match = re.search(pattern, raw_text, re.DOTALL | re.IGNORECASE)
-            if match:
-                insights[key] = match.group(1).strip()
-            else:
-                # Fallback to simple parsing
-                if "Diagnostic Insight" in raw_text:
-                    insights["diagnostic"] = (
-                        raw_text.split("Diagnostic Insight")[1]
-                        .split("Prescriptive Actions")[0]
-                        .strip(": \n")
-                    )
-                if "Prescriptive Actions" in raw_text:
-                    insights["prescriptive"] = (
-                        raw_text.split("Prescriptive Actions")[1]
-                        .split("Preventive Strategy")[0]
-                        .strip(": \n")
-                    )
-                if "Preventive Strategy" in raw_text:
-                    insights["preventive"] = raw_text.split("Preventive Strategy")[
-                        1
-                    ].strip(": \n")
-
-                # Final fallback if still empty
-                if not insights[key]:
-                    insights[key] = (
-                        f"⚠️ Insight generation failed for {key.replace('_', ' ').title()}"
-                    )
+def _employee_message(employee_row, fields, drivers):
+    probability = employee_row.get("Attrition_Probability", 0)
+    lines = [
+        f"Risk level: {risk_label(probability)}"
+        f" (attrition probability {probability:.0%})",
+        "Profile: "
+        + "; ".join(
+            f"{field}={_compact_value(employee_row[field])}" for field in fields
+        ),
+    ]
+    if drivers:
+        lines.append(
+            "Key risk drivers: "
+            + "; ".join(
+                f"{driver['feature']}={_compact_value(driver['value'])}"
+                f" ({driver['contribution'] * 100:+.1f} pts)"
+                for driver in drivers
+            )
+        )
+    return "\n".join(lines)
+
+
+def build_prompt(employee_row, drivers=None, token_budget=None):
+    """The per-employee message sent after SYSTEM_PROMPT.
+
+    Only PROFILE_FIELDS are included, as compact ``field=value`` pairs.
+    ``drivers`` come from feature_attribution. While the whole prompt is
+    estimated above ``token_budget``, the least important profile fields
+    are dropped; fields that are also drivers are always kept.
+    """
+    token_budget = LLM_PROMPT_TOKEN_BUDGET if token_budget is None else token_budget
+    available = token_budget - estimate_tokens(SYSTEM_PROMPT)
+    fields = [field for field in PROFILE_FIELDS if field in employee_row]
+    keep = {driver["feature"] for driver in drivers or []}
+    message = _employee_message(employee_row, fields, drivers)
+    while estimate_tokens(message) > available:
+        droppable = [field for field in fields if field not in keep]
+        if not droppable:
+            break
+        fields.remove(droppable[-1])
+        message = _employee_message(employee_row, fields, drivers)
+    return message
+
+
+def build_messages(employee_row, drivers=None, token_budget=None):
+    """Chat messages for one employee: the shared system prompt, then theirs"""
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": build_prompt(employee_row, drivers, token_budget)},
+    ]
+
+
+def _cache_key(messages):
+    return insight_key(
+        "\n".join(message["content"] for message in messages),
+        LLM_MODEL,
+        SAMPLING_PARAMS,
+    )
+
+
+SECTION_TITLES = {
+    "diagnostic": "Diagnostic Insight",
+    "prescriptive": "Prescriptive Actions",
+    "preventive": "Preventive Strategy",
+}
+
+
+class IncrementalSectionParser:
+    """Split a completion into its three sections while it is still streaming.
+
+    Text is fed in arbitrary deltas; complete lines are routed to the section
+    whose header was seen last, so each section can be rendered as soon as
+    its header arrives. Text before the first header is ignored.
+    """
+
+    def __init__(self):
+        self.sections = {key: [] for key in SECTION_TITLES}
+        self.current = None
+        self._pending = ""
+
+    @staticmethod
+    def _plain_title(text):
+        """``text`` lower-cased, without list numbering such as "1." or "2)" """
+        return text.strip().lstrip("0123456789.) ").lower()
 
+    @classmethod
+    def _header_for(cls, line):
+        """``(section key, text after the title)`` if ``line`` is a header.
+
+        Headers are markdown (``### Diagnostic Insight``, ``**...**``) or a
+        plain title at the start of a line, optionally followed by a colon
+        and the first words of the section.
+        """
+        stripped = line.strip()
+        if stripped.startswith(("#", "*")):
+            title = stripped.strip("#*: ").lower()
+            for key, section_title in SECTION_TITLES.items():
+                if title.endswith(section_title.lower()):
+                    return key, ""
+            return None
+        plain = cls._plain_title(stripped)
+        for key, section_title in SECTION_TITLES.items():
+            title = section_title.lower()
+            rest = plain[len(title) :]
+            if plain.startswith(title) and (not rest or rest.startswith(":")):
+                return key, stripped[len(stripped) - len(rest) :].lstrip(": ")
+        return None
+
+    @classmethod
+    def _may_be_header(cls, partial):
+        stripped = partial.lstrip()
+        if stripped.startswith("#"):
+            return True
+        # Other lines are only held back while they still read like a title
+        title = (
+            stripped.strip("*: ").lower()
+            if stripped.startswith("*")
+            else cls._plain_title(stripped)
+        )
+        return bool(title) and any(
+            section_title.lower().startswith(title)
+            or title.startswith(section_title.lower())
+            for section_title in SECTION_TITLES.values()
+        )
+
+    def _add_line(self, line):
+        header = self._header_for(line)
+        if header is not None:
+            self.current, line = header
+            if not line:
+                return
+        if self.current is not None:
+            self.sections[self.current].append(line)
+
+    def feed(self, delta):
+        """Add a chunk of text; returns the key of the section being written"""
+        *lines, self._pending = (self._pending + delta).split("\n")
+        for line in lines:
+            self._add_line(line)
+        return self.current
+
+    def snapshot(self):
+        """Sections so far, including the unfinished last line"""
+        snapshot = {
+            key: "\n".join(lines).strip() for key, lines in self.sections.items()
+        }
+        # Hold back a partial line that may turn out to be the next header
+        if self.current is not None and not self._may_be_header(self._pending):
+            snapshot[self.current] = (
+                "\n".join(self.sections[self.current] + [self._pending])
+            ).strip()
+        return snapshot
+
+    def finish(self):
+        """Final sections, with a failure note for any section never received"""
+        self._add_line(self._pending)
+        self._pending = ""
+        insights = self.snapshot()
+        for key, text in insights.items():
+            if not text:
+                insights[key] = (
+                    f"⚠️ Insight generation failed for {key.replace('_', ' ').title()}"
+                )
         return insights
 
+
+def parse_insights(raw_text):
+    """Split a completion into diagnostic, prescriptive and preventive sections"""
+    parser = IncrementalSectionParser()
+    parser.feed(raw_text)
+    return parser.finish()
+
+
+def _error_insights(error):
+    return {
+        "diagnostic": f"**API Error**: {str(error)}",
+        "prescriptive": "Please try again later",
+        "preventive": "System maintenance in progress",
+    }
+
+
+def _is_complete(insights):
+    return not any(
+        text.startswith("⚠️ Insight generation failed") for text in insights.values()
+    )
+
+
+def generate_insights(employee_row, use_cache=True, drivers=None):
+    """Insight sections for one employee.
+
+    The call is recorded as stage "generate_insights", with the estimated
+    and reported token usage of its request as the stage's counters.
+    """
+    with stage("generate_insights") as record:
+        return _generate_insights(employee_row, use_cache, drivers, record)
+
+
+def _generate_insights(employee_row, use_cache, drivers, record):
+    messages = build_messages(employee_row, drivers)
+    key = _cache_key(messages)
+    if use_cache:
+        cached = get_insight_cache().get(key)
+        if cached is not None:
+            increment("insight_cache_hits")
+            return cached
+
+    record.count(
+        "estimated_prompt_tokens",
+        sum(estimate_tokens(message["content"]) for message in messages),
+    )
+    try:
+        response = _complete_with_retry(messages)
+        _record_usage(record, response.usage)
+        insights = parse_insights(response.choices[0].message.content.strip())
+
     except Exception as e:
-        return {
-            "diagnostic": f"**API Error**: {str(e)}",
-            "prescriptive": "Please try again later",
-            "preventive": "System maintenance in progress",
+        increment("llm_errors")
+        return _error_insights(e)
+
+    # Only fully parsed responses are worth serving again
+    if use_cache and _is_complete(insights):
+        get_insight_cache().put(key, insights)
+    return insights
+
+
+def generate_insights_batch(
+    employee_rows, max_concurrency=None, progress_callback=None, drivers=None
+):
+    """Generate insights for many employees concurrently.
+
+    At most ``max_concurrency`` requests are in flight at once; each one
+    backs off and retries on rate limits. ``progress_callback(done, total)``
+    is called from the calling thread as results arrive. Results are
+    returned in the order of ``employee_rows``. ``drivers`` optionally holds
+    the attribution drivers of each row, in the same order.
+    """
+    employee_rows = list(employee_rows)
+    drivers = [None] * len(employee_rows) if drivers is None else list(drivers)
+    results = [None] * len(employee_rows)
+    with ThreadPoolExecutor(
+        max_workers=max_concurrency or LLM_MAX_CONCURRENCY,
+        thread_name_prefix="insights",
+    ) as pool:
+        futures = {
+            pool.submit(generate_insights, row, drivers=row_drivers): index
+            for index, (row, row_drivers) in enumerate(zip(employee_rows, drivers))
         }
+        for done, future in enumerate(as_completed(futures), start=1):
+            results[futures[future]] = future.result()
+            if progress_callback is not None:
+                progress_callback(done, len(employee_rows))
+    return results
+
+
+def stream_insights(employee_row, use_cache=True, drivers=None):
+    """Yield the insight sections as they stream in, ending with the final ones.
+
+    Each yielded dict holds the text received so far for every section; a
+    cached answer is yielded at once. The recorded stage time runs until
+    the last section has been consumed.
+    """
+    with stage("stream_insights") as record:
+        yield from _stream_insights(employee_row, use_cache, drivers, record)
+
+
+def _stream_insights(employee_row, use_cache, drivers, record):
+    messages = build_messages(employee_row, drivers)
+    key = _cache_key(messages)
+    if use_cache:
+        cached = get_insight_cache().get(key)
+        if cached is not None:
+            increment("insight_cache_hits")
+            yield cached
+            return
+
+    record.count(
+        "estimated_prompt_tokens",
+        sum(estimate_tokens(message["content"]) for message in messages),
+    )
+    parser = IncrementalSectionParser()
+    try:
+        for chunk in _complete_with_retry(messages, stream=True):
+            if chunk.choices and chunk.choices[0].delta.content:
+                parser.feed(chunk.choices[0].delta.content)
+                yield parser.snapshot()
+            _record_usage(record, chunk.usage)
+    except Exception as e:
+        increment("llm_errors")
+        yield _error_insights(e)
+        return
+
+    insights = parser.finish()
+    if use_cache and _is_complete(insights):
+        get_insight_cache().put(key, insights)
+    yield insights
@@ -0,0 +1,200 @@
+"""Local stand-in for the DeepSeek chat completions endpoint.
+
+Usage:
+    python src/llm_stub_server.py --port 8089 --latency 0.5 --rate-limit 0.2
+    DEEPSEEK_BASE_URL=http://127.0.0.1:8089/v1 DEEPSEEK_API_KEY=stub streamlit run src/app.py
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_COMPLETION = """### Diagnostic Insight
+**Engagement Score** and **Job Satisfaction** are the main retention factors for this employee.
+
+### Prescriptive Actions
+- Schedule a career conversation within two weeks
+- Review **Overtime Hours** with the line manager
+- Offer a training or certification budget
+
+### Preventive Strategy
+Run quarterly stay interviews for employees with similar profiles."""
+# Characters per streamed delta; --latency is spread across all deltas
+STREAM_TOKEN_CHARS = 4
+
+
+class StubState:
+    def __init__(self, latency=0.0, rate_limit=0.0, retry_after=1):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.requests = 0
+        self.rate_limited = 0
+        # System prompts already sent, to report prompt cache hits as DeepSeek does
+        self.seen_prefixes = set()
+        self.lock = threading.Lock()
+
+    def usage(self, request):
+        """Token usage of a request, counting about four characters per token"""
+        messages = request["messages"]
+        prompt_tokens = sum(len(message["content"]) // 4 for message in messages)
+        prefix = messages[0]["content"] if messages[0]["role"] == "system" else None
+        with self.lock:
+            cached = prefix is not None and prefix in self.seen_prefixes
+            if prefix is not None:
+                self.seen_prefixes.add(prefix)
+        hit_tokens = len(prefix) // 4 if cached else 0
+        completion_tokens = len(STUB_COMPLETION) // 4
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_cache_hit_tokens": hit_tokens,
+            "prompt_cache_miss_tokens": prompt_tokens - hit_tokens,
+        }
+
+
+def make_handler(state):
+    class StubHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, payload, headers=None):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.rstrip("/") == "/stats":
+                with state.lock:
+                    stats = {
+                        "requests": state.requests,
+                        "rate_limited": state.rate_limited,
+                    }
+                self._send_json(200, stats)
+            else:
+                self._send_json(404, {"error": {"message": "Not found"}})
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send_json(404, {"error": {"message": "Not found"}})
+                return
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+
+            with state.lock:
+                state.requests += 1
+                limited = random.random() < state.rate_limit
+                state.rate_limited += limited
+            if limited:
+                self._send_json(
+                    429,
+                    {"error": {"message": "Rate limit reached", "type": "rate_limit"}},
+                    headers={"Retry-After": str(state.retry_after)},
+                )
+                return
+
+            if request.get("stream"):
+                self._stream_completion(request)
+                return
+
+            time.sleep(state.latency)
+            self._send_json(
+                200,
+                {
+                    "id": f"chatcmpl-{uuid.uuid4().hex}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request.get("model", "deepseek-chat"),
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {
+                                "role": "assistant",
+                                "content": STUB_COMPLETION,
+                            },
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": state.usage(request),
+                },
+            )
+
+        def _stream_completion(self, request):
+            """Send the canned completion as server-sent events, a few chars at a time"""
+            tokens = [
+                STUB_COMPLETION[i : i + STREAM_TOKEN_CHARS]
+                for i in range(0, len(STUB_COMPLETION), STREAM_TOKEN_CHARS)
+            ]
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+            for token in tokens:
+                time.sleep(state.latency / len(tokens))
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": request.get("model", "deepseek-chat"),
+                    "choices": [
+                        {"index": 0, "delta": {"content": token}, "finish_reason": None}
+                    ],
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+            if (request.get("stream_options") or {}).get("include_usage"):
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": request.get("model", "deepseek-chat"),
+                    "choices": [],
+                    "usage": state.usage(request),
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.write(b"data: [DONE]\n\n")
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def serve(host="127.0.0.1", port=8089, latency=0.0, rate_limit=0.0, retry_after=1):
+    """Start the stub server on a background thread and return it"""
+    state = StubState(latency, rate_limit, retry_after)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.state = state
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local DeepSeek stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds")
+    parser.add_argument(
+        "--rate-limit", type=float, default=0.0, help="fraction of requests to 429"
+    )
+    parser.add_argument("--retry-after", type=int, default=1, help="seconds")
+    args = parser.parse_args()
+
+    server = serve(
+        args.host, args.port, args.latency, args.rate_limit, args.retry_after
+    )
+    print(f"Stub DeepSeek endpoint on http://{args.host}:{args.port}/v1")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
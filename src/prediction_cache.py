@@ -0,0 +1,162 @@
+import hashlib
+import os
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+
+import joblib
+import pandas as pd
+
+sys.path.append(os.path.dirname(__file__))
+from artifact_store import artifact_fingerprint
+from incremental_scoring import incremental_predict_attrition
+from instrumentation import increment
+from prediction_store import compact_predictions
+from utils import MODEL_PATH, PREPROCESSOR_PATH, RISK_LABELS, RISK_THRESHOLDS
+
+CACHE_MAX_ENTRIES = int(os.getenv("PREDICTION_CACHE_MAX_ENTRIES", "8"))
+CACHE_MAX_BYTES = int(os.getenv("PREDICTION_CACHE_MAX_MB", "1024")) * 1024**2
+# Set to a directory to keep cached predictions across restarts
+CACHE_DIR = os.getenv("PREDICTION_CACHE_DIR")
+CACHE_MAX_DISK_ENTRIES = int(os.getenv("PREDICTION_CACHE_MAX_DISK_ENTRIES", "32"))
+
+
+def _digest():
+    return hashlib.blake2b(digest_size=16)
+
+
+def dataset_fingerprint(df):
+    """Fast content hash of a DataFrame, including column names and dtypes"""
+    digest = _digest()
+    digest.update(repr(list(zip(df.columns, df.dtypes.astype(str)))).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def prediction_key(df):
+    """Cache key for scoring ``df`` with the current artifacts and settings.
+
+    The date is part of the key because the engineered features are measured
+    against today, so yesterday's scores are not reused.
+    """
+    parts = [
+        dataset_fingerprint(df),
+        artifact_fingerprint(MODEL_PATH),
+        artifact_fingerprint(PREPROCESSOR_PATH),
+        repr((RISK_THRESHOLDS, RISK_LABELS)),
+        pd.Timestamp("today").strftime("%Y-%m-%d"),
+    ]
+    return hashlib.blake2b("|".join(parts).encode(), digest_size=16).hexdigest()
+
+
+def _estimate_bytes(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, dict):
+        return sum(_estimate_bytes(item) for item in value.values())
+    return sys.getsizeof(value)
+
+
+class PredictionCache:
+    """Process-wide LRU cache of scored frames with an optional disk tier.
+
+    Frames evicted from the LRU stay reachable through weak references for
+    as long as a session still holds them, so a new session loading the
+    same data shares that frame instead of building a second copy.
+    """
+
+    def __init__(self, max_entries=8, max_bytes=1024**3, directory=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._evicted = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.joblib")
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            value = self._evicted.get(key)
+        if value is not None:
+            self._remember(key, value)
+            return value
+        if self.directory and os.path.exists(self._path(key)):
+            value = joblib.load(self._path(key))
+            self._remember(key, value)
+            return value
+        return None
+
+    def put(self, key, value):
+        self._remember(key, value)
+        if self.directory:
+            joblib.dump(value, self._path(key))
+            self._prune_disk()
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._sizes[key] = _estimate_bytes(value)
+            self._entries.move_to_end(key)
+            # Always keep the newest entry, even if it alone exceeds the budget
+            while len(self._entries) > 1 and (
+                len(self._entries) > self.max_entries
+                or sum(self._sizes.values()) > self.max_bytes
+            ):
+                evicted, value = self._entries.popitem(last=False)
+                del self._sizes[evicted]
+                try:
+                    self._evicted[evicted] = value
+                except TypeError:
+                    # Not weakly referenceable, e.g. a dict of rollups
+                    pass
+
+    def _prune_disk(self):
+        paths = sorted(
+            (
+                os.path.join(self.directory, name)
+                for name in os.listdir(self.directory)
+                if name.endswith(".joblib")
+            ),
+            key=os.path.getmtime,
+        )
+        for path in paths[:-CACHE_MAX_DISK_ENTRIES]:
+            os.remove(path)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._evicted.clear()
+
+
+prediction_cache = PredictionCache(
+    max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES, directory=CACHE_DIR
+)
+
+
+def cached_predict_attrition(df):
+    """predict_attrition backed by the shared prediction cache.
+
+    On a miss only employees changed since the last scored extract are sent
+    through the model (see incremental_scoring), and the result is stored
+    in compact dtypes (see prediction_store). The returned frame is shared
+    with other sessions and is not write-protected: copy it before changing
+    it. Its cache key is kept in ``attrs["cache_key"]``.
+    """
+    key = prediction_key(df)
+    pred_df = prediction_cache.get(key)
+    increment("prediction_cache_misses" if pred_df is None else "prediction_cache_hits")
+    if pred_df is None:
+        pred_df = compact_predictions(incremental_predict_attrition(df))
+        pred_df.attrs["cache_key"] = key
+        prediction_cache.put(key, pred_df)
+    return pred_df
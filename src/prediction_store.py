@@ -0,0 +1,157 @@
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(__file__))
+from utils import HIGH_RISK_LABEL
+
+# Memory one session may hold on its own, beyond the shared predictions
+SESSION_MEMORY_BUDGET_MB = float(os.getenv("SESSION_MEMORY_BUDGET_MB", "256"))
+# Text columns with at most this many distinct values per row become categorical
+CATEGORY_MAX_RATIO = 0.5
+# Sessions not seen for this long drop out of the diagnostics report
+SESSION_REPORT_TTL = 3600
+
+
+def estimate_bytes(value):
+    """Approximate memory held by a session state value"""
+    if isinstance(value, SessionPredictions):
+        return value.own_bytes
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_bytes(item) for item in value.values()
+        )
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_bytes(item) for item in value)
+    return sys.getsizeof(value)
+
+
+def _compact_column(column):
+    numeric = isinstance(column.dtype, np.dtype) and column.dtype.kind in "iuf"
+    values = column.to_numpy() if numeric else None
+    if values is not None and values.dtype.kind == "f":
+        missing = np.isnan(values)
+        whole = np.array_equal(values[~missing], np.round(values[~missing]))
+        if not missing.any() and whole:
+            return pd.to_numeric(column, downcast="integer")
+        as_float32 = values.astype(np.float32)
+        if np.array_equal(as_float32.astype(values.dtype), values, equal_nan=True):
+            return column.astype(np.float32)
+        return column
+    if values is not None:
+        return pd.to_numeric(column, downcast="integer")
+    if isinstance(column.dtype, pd.CategoricalDtype) or column.dtype == bool:
+        return column
+    if column.nunique(dropna=True) <= CATEGORY_MAX_RATIO * len(column):
+        return column.astype("category")
+    return column
+
+
+def compact_predictions(pred_df):
+    """Copy of ``pred_df`` in the smallest dtypes that hold its values exactly.
+
+    Whole-number floats without gaps become the smallest integer type,
+    floats that survive a round trip become float32, and repetitive text
+    such as dates becomes categorical. Probabilities and other values that
+    would change are left as they are.
+    """
+    compact = pd.DataFrame(
+        {name: _compact_column(column) for name, column in pred_df.items()},
+        index=pred_df.index,
+    )
+    compact.attrs.update(pred_df.attrs)
+    return compact
+
+
+class SessionPredictions:
+    """A session's handle on the shared predictions.
+
+    Holds a reference to the process-wide frame instead of a copy, plus the
+    row positions of the session's subsets. Subsets are materialized only
+    when asked for and are not kept in session state. Nothing stops writes
+    to ``frame``, and any in-place change would show in every session;
+    callers must ``copy()`` it before modifying it.
+    """
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.at_risk_rows = np.flatnonzero(
+            (frame["Risk_Label"] == HIGH_RISK_LABEL).to_numpy()
+        ).astype(np.int32 if len(frame) < 2**31 else np.int64)
+
+    @property
+    def key(self):
+        return self.frame.attrs.get("cache_key")
+
+    @property
+    def at_risk(self):
+        return self.frame.iloc[self.at_risk_rows]
+
+    @property
+    def at_risk_count(self):
+        return len(self.at_risk_rows)
+
+    @property
+    def own_bytes(self):
+        return self.at_risk_rows.nbytes + sys.getsizeof(self)
+
+
+def session_predictions(pred_df, current=None):
+    """Handle on ``pred_df``, reusing ``current`` if it already points at it"""
+    if isinstance(current, SessionPredictions) and current.frame is pred_df:
+        return current
+    return SessionPredictions(pred_df)
+
+
+def session_memory_report(session_state, budget_mb=None):
+    """Memory held by one session, apart from what it shares with others.
+
+    Returns MB figures for the session's own entries, the shared
+    predictions it references, its budget, and its five largest entries.
+    """
+    budget_mb = SESSION_MEMORY_BUDGET_MB if budget_mb is None else budget_mb
+    own, shared = {}, {}
+    for name, value in session_state.items():
+        own[name] = estimate_bytes(value)
+        if isinstance(value, SessionPredictions):
+            shared[value.key or name] = int(value.frame.memory_usage(deep=True).sum())
+    session_mb = sum(own.values()) / 1024**2
+    largest = sorted(own.items(), key=lambda item: item[1], reverse=True)[:5]
+    return {
+        "session_mb": round(session_mb, 2),
+        "shared_mb": round(sum(shared.values()) / 1024**2, 2),
+        "budget_mb": budget_mb,
+        "over_budget": session_mb > budget_mb,
+        "largest": {name: round(size / 1024**2, 3) for name, size in largest},
+    }
+
+
+_session_reports = {}
+_session_reports_lock = threading.Lock()
+
+
+def record_session_report(session_id, report):
+    """Keep the latest report of each session for the diagnostics panel"""
+    now = time.time()
+    with _session_reports_lock:
+        _session_reports[session_id] = (now, report)
+        for stale in [
+            sid
+            for sid, (seen, _) in _session_reports.items()
+            if now - seen > SESSION_REPORT_TTL
+        ]:
+            del _session_reports[stale]
+
+
+def session_reports():
+    """Latest report of every recently active session, by session id"""
+    with _session_reports_lock:
+        return {sid: dict(report) for sid, (_, report) in _session_reports.items()}
@@ -1,4 +1,6 @@
+import numpy as np
 import pandas as pd
+from pandas.tseries.api import guess_datetime_format
 from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler, OneHotEncoder
@@ -6,42 +8,104 @@ from sklearn.compose import ColumnTransformer
 from sklearn.impute import SimpleImputer
 import joblib
 
+CATEGORICAL_FEATURES = ["department"]
+DATE_COLUMNS = ["hire_date", "last_promotion_date"]
+ENGINEERED_FEATURES = ["years_since_last_promotion", "employment_age"]
+NUMERICAL_FEATURES = [
+    "salary",
+    "tenure",
+    "engagement_score",
+    "working_hours_per_month",
+    "kpi_score",
+    "work_life_balance_score",
+    "overtime_hours",
+    "job_satisfaction",
+    "number_of_projects",
+    "distance_from_home",
+    "trainings_and_certifications",
+] + ENGINEERED_FEATURES
+
+# Columns an input dataset must provide before feature engineering
+RAW_NUMERICAL_FEATURES = [c for c in NUMERICAL_FEATURES if c not in ENGINEERED_FEATURES]
+INPUT_COLUMNS = CATEGORICAL_FEATURES + RAW_NUMERICAL_FEATURES + DATE_COLUMNS
+
+NANOSECONDS_PER_DAY = 86_400 * 10**9
+
 
 class FeatureEngineer(BaseEstimator, TransformerMixin):
+    """Derive tenure-style features from the hire and last promotion dates.
+
+    ``reference_date`` pins the date the day deltas are measured against;
+    when left as ``None`` the current time is read once per ``transform``
+    call. ``date_format`` fixes the date format; otherwise it is guessed once
+    per column from the first value instead of being inferred row by row.
+    """
+
+    # Class-level defaults keep transformers pickled before these parameters
+    # existed loadable
+    reference_date = None
+    date_format = None
+
+    def __init__(self, reference_date=None, date_format=None):
+        self.reference_date = reference_date
+        self.date_format = date_format
+
     def fit(self, X, y=None):
         return self
 
+    def _reference_timestamp(self):
+        if self.reference_date is None:
+            return pd.Timestamp("today")
+        return pd.Timestamp(self.reference_date)
+
+    def _date_format_for(self, values):
+        if self.date_format is not None:
+            return self.date_format
+        # By position: a duplicated index label would select several rows
+        present = values.notna().to_numpy()
+        if not present.any():
+            return None
+        return guess_datetime_format(str(values.iloc[present.argmax()]))
+
+    def _parse_dates(self, values):
+        """Return a column as datetime64[ns], parsing strings with a fixed format"""
+        if pd.api.types.is_datetime64_any_dtype(values):
+            return values.to_numpy(dtype="datetime64[ns]")
+        # Dates repeat heavily across employees, so parse each distinct string
+        # once and broadcast the result back with the factorized codes. The
+        # trailing NaT is what the -1 code of missing values picks up.
+        codes, uniques = pd.factorize(values)
+        parsed = pd.to_datetime(
+            uniques, format=self._date_format_for(values), errors="coerce"
+        ).to_numpy(dtype="datetime64[ns]")
+        return np.append(parsed, np.datetime64("NaT", "ns"))[codes]
+
     def transform(self, X):
-        X_ = X.copy()
-        X_["hire_date"] = pd.to_datetime(X_["hire_date"], errors="coerce")
-        X_["last_promotion_date"] = pd.to_datetime(
-            X_["last_promotion_date"], errors="coerce"
+        dates = np.column_stack(
+            [self._parse_dates(X[column]) for column in DATE_COLUMNS]
+        )
+        missing = np.isnat(dates)
+        # Day deltas for both columns in one int64 operation
+        days = (
+            self._reference_timestamp().as_unit("ns").value - dates.view(np.int64)
+        ) // NANOSECONDS_PER_DAY
+        years = np.where(missing, np.nan, days / 365)
+
+        # Build the output from the existing column arrays instead of copying
+        # the whole frame
+        X_ = pd.DataFrame(
+            {column: X[column] for column in X.columns if column not in DATE_COLUMNS},
+            copy=False,
         )
-        X_["years_since_last_promotion"] = (
-            pd.to_datetime("today") - X_["last_promotion_date"]
-        ).dt.days / 365
-        X_["employment_age"] = (pd.to_datetime("today") - X_["hire_date"]).dt.days / 365
-        return X_.drop(columns=["hire_date", "last_promotion_date"])
+        X_["years_since_last_promotion"] = years[:, 1]
+        X_["employment_age"] = years[:, 0]
+        return X_
 
 
 class PreprocessingPipeline:
     def __init__(self):
-        self.categorical_features = ["department"]
-        self.numerical_features = [
-            "salary",
-            "tenure",
-            "engagement_score",
-            "working_hours_per_month",
-            "kpi_score",
-            "work_life_balance_score",
-            "overtime_hours",
-            "job_satisfaction",
-            "number_of_projects",
-            "distance_from_home",
-            "trainings_and_certifications",
-            "years_since_last_promotion",
-            "employment_age",
-        ]
+        self.categorical_features = list(CATEGORICAL_FEATURES)
+        self.numerical_features = list(NUMERICAL_FEATURES)
         self.pipeline = self._build_pipeline()
 
     def _build_pipeline(self):
@@ -86,7 +150,9 @@ class PreprocessingPipeline:
         return self.pipeline.fit_transform(X)
 
     def save(self, path):
+        # Stored uncompressed so the arrays can be memory-mapped on load
         joblib.dump(self.pipeline, path)
 
-    def load(self, path):
-        self.pipeline = joblib.load(path)
+    def load(self, path, mmap_mode=None):
+        """Load a saved pipeline; ``mmap_mode="r"`` maps its arrays read-only"""
+        self.pipeline = joblib.load(path, mmap_mode=mmap_mode)
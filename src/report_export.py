@@ -0,0 +1,133 @@
+import gzip
+import io
+import os
+import sys
+import tempfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.append(os.path.dirname(__file__))
+from instrumentation import instrumented
+
+# Rows converted and written at a time
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "50000"))
+# Reports up to this size are assembled in memory, larger ones on disk
+EXPORT_SPOOL_BYTES = int(os.getenv("EXPORT_SPOOL_MB", "32")) * 1024**2
+# gzip level of CSV exports; above 6 the files barely shrink but take far longer
+EXPORT_GZIP_LEVEL = int(os.getenv("EXPORT_GZIP_LEVEL", "6"))
+# Excel sheets hold 1,048,576 rows including the header; longer reports
+# continue on further sheets
+EXCEL_MAX_ROWS = 1_048_575
+
+REPORT_FORMATS = {
+    "Compressed CSV": {"extension": ".csv.gz", "mime": "application/gzip"},
+    "Parquet": {"extension": ".parquet", "mime": "application/vnd.apache.parquet"},
+    "Excel": {
+        "extension": ".xlsx",
+        "mime": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    },
+}
+
+
+def iter_report_chunks(frame, rows=None, chunk_rows=None):
+    """``frame``, or only its ``rows`` positions, in slices of ``chunk_rows``"""
+    chunk_rows = chunk_rows or EXPORT_CHUNK_ROWS
+    total = len(frame) if rows is None else len(rows)
+    for start in range(0, total, chunk_rows):
+        if rows is None:
+            yield frame.iloc[start : start + chunk_rows]
+        else:
+            yield frame.iloc[rows[start : start + chunk_rows]]
+
+
+def _write_csv_gzip(chunks, output, empty):
+    # mtime=0 keeps the archive identical for identical reports
+    with gzip.GzipFile(
+        fileobj=output, mode="wb", compresslevel=EXPORT_GZIP_LEVEL, mtime=0
+    ) as compressed:
+        text = io.TextIOWrapper(compressed, encoding="utf-8", newline="")
+        written = False
+        for chunk in chunks:
+            chunk.to_csv(text, header=not written, index=False)
+            written = True
+        if not written:
+            # No rows: still write the header, as the other formats do
+            empty.to_csv(text, index=False)
+        text.flush()
+        text.detach()
+
+
+def _parquet_schema(frame):
+    """Arrow schema of the whole report, so every chunk is written alike"""
+    schema = pa.Schema.from_pandas(frame.iloc[:0], preserve_index=False)
+    for i, field in enumerate(schema):
+        if pa.types.is_null(field.type):
+            # Empty object columns infer as null; type them by their first value
+            values = frame[field.name].dropna()
+            if len(values):
+                schema = schema.set(i, field.with_type(pa.array(values.iloc[:1]).type))
+    return schema
+
+
+def _write_parquet(chunks, output, schema):
+    with pq.ParquetWriter(output, schema) as writer:
+        for chunk in chunks:
+            writer.write_table(
+                pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            )
+
+
+def _write_excel(chunks, output, columns):
+    from openpyxl import Workbook
+
+    # Write-only mode streams rows to the file instead of keeping cells
+    workbook = Workbook(write_only=True)
+    sheet, sheet_rows = None, EXCEL_MAX_ROWS
+    for chunk in chunks:
+        # Excel has no NaN; missing values become empty cells
+        values = chunk.astype(object).where(chunk.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            if sheet_rows == EXCEL_MAX_ROWS:
+                sheet = workbook.create_sheet(
+                    f"Employees {len(workbook.worksheets) + 1}"
+                    if workbook.worksheets
+                    else "Employees"
+                )
+                sheet.append(list(columns))
+                sheet_rows = 0
+            sheet.append(row)
+            sheet_rows += 1
+    if sheet is None:
+        workbook.create_sheet("Employees").append(list(columns))
+    workbook.save(output)
+
+
+@instrumented("export_report")
+def build_report(frame, report_format, rows=None, chunk_rows=None):
+    """The report file for ``frame`` (or its ``rows``) as an open binary file.
+
+    Rows are converted and written ``chunk_rows`` at a time, into memory
+    for small reports and a temporary file for large ones, so the whole
+    report never exists as one string. The caller owns the returned file.
+    """
+    if report_format not in REPORT_FORMATS:
+        raise ValueError(f"Unsupported report format {report_format!r}")
+    chunks = iter_report_chunks(frame, rows, chunk_rows)
+    output = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_BYTES)
+    try:
+        if report_format == "Compressed CSV":
+            _write_csv_gzip(chunks, output, frame.iloc[:0])
+        elif report_format == "Parquet":
+            _write_parquet(chunks, output, _parquet_schema(frame))
+        else:
+            _write_excel(chunks, output, frame.columns)
+    except BaseException:
+        output.close()
+        raise
+    output.seek(0)
+    return output
+
+
+def report_file_name(stem, report_format):
+    return stem + REPORT_FORMATS[report_format]["extension"]
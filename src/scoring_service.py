@@ -0,0 +1,341 @@
+"""HTTP/JSON attrition scoring service.
+
+Endpoints:
+    POST /score        one employee object -> its score
+    POST /score/bulk   {"employees": [...]} -> {"results": [...]}
+    GET  /metrics      latency percentiles and batch-size histogram
+    GET  /health
+
+Concurrent requests are coalesced into a single scoring call. Dates are
+ISO 8601 strings, e.g. "2021-04-01"; a date in any other format is rejected.
+
+Usage:
+    python src/scoring_service.py --port 8090
+    curl -s localhost:8090/score -d '{"EmployeeID": 7, "department": "Sales", ...}'
+"""
+
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(__file__))
+from preprocessing_pipeline import DATE_COLUMNS, INPUT_COLUMNS, RAW_NUMERICAL_FEATURES
+from fast_inference import FAST_PATH_MAX_ROWS, get_compiled_scorer
+from utils import assign_risk_bands, score_probabilities
+
+# Most rows scored in one call
+SCORING_MAX_BATCH_ROWS = int(os.getenv("SCORING_MAX_BATCH_ROWS", "512"))
+# How long a batch may wait for more requests. Requests that arrive while
+# the model is busy are batched regardless, so this only matters under
+# light load and defaults to not waiting at all.
+SCORING_MAX_WAIT_MS = float(os.getenv("SCORING_MAX_WAIT_MS", "0"))
+# Latencies kept for the percentiles reported by /metrics
+LATENCY_WINDOW = 10_000
+ID_COLUMN = "EmployeeID"
+
+
+def _number(value, column):
+    if value is None:
+        return np.nan
+    try:
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            raise TypeError(type(value).__name__)
+        return float(value)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"{column} must be a number") from e
+
+
+def _date(value, column):
+    if value is None:
+        return None
+    try:
+        date = datetime.fromisoformat(value)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"{column} must be an ISO 8601 date") from e
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc).replace(tzinfo=None)
+    return date
+
+
+def parse_employees(records):
+    """Model input rows from a list of employee dicts, as plain tuples.
+
+    Missing fields become missing values, which the preprocessor imputes.
+    Raises ValueError for fields that cannot be read as numbers or as ISO
+    8601 dates. Dates are parsed here, per request: left as text,
+    FeatureEngineer would guess one format from the first row of the whole
+    micro-batch, so a request's score would depend on its batch-mates.
+    """
+    rows = []
+    for record in records:
+        row = []
+        for column in INPUT_COLUMNS:
+            value = record.get(column)
+            if column in RAW_NUMERICAL_FEATURES:
+                value = _number(value, column)
+            elif column in DATE_COLUMNS:
+                value = _date(value, column)
+            elif not (value is None or isinstance(value, (str, int, float))):
+                raise ValueError(f"{column} must be a string")
+            row.append(value)
+        rows.append(tuple(row))
+    return rows
+
+
+def employee_columns(rows):
+    """Columns of the model input for rows from parse_employees"""
+    columns = {}
+    for column, values in zip(INPUT_COLUMNS, zip(*rows) if rows else repeat(())):
+        if column in RAW_NUMERICAL_FEATURES:
+            columns[column] = np.array(values, dtype=np.float64)
+        elif column in DATE_COLUMNS:
+            columns[column] = np.array(values, dtype="datetime64[ns]")
+        else:
+            columns[column] = np.array(values, dtype=object)
+    return columns
+
+
+def employees_frame(records):
+    """Model input frame from a list of employee dicts"""
+    return pd.DataFrame(employee_columns(parse_employees(records)))
+
+
+def score_employees(rows):
+    """Attrition probabilities of rows from parse_employees.
+
+    Batches up to FAST_PATH_MAX_ROWS go to the compiled scorer as columns,
+    without building a DataFrame; larger ones go through the pipeline.
+    """
+    columns = employee_columns(rows)
+    if len(rows) <= FAST_PATH_MAX_ROWS:
+        return get_compiled_scorer().score(columns)
+    return score_probabilities(pd.DataFrame(columns))
+
+
+class MicroBatcher:
+    """Single scoring thread that coalesces queued requests into batches.
+
+    While one batch is being scored, new requests queue up and are all
+    taken as the next batch, so batches grow with load without a fixed
+    wait. Requests hand over parsed rows, not DataFrames, so the per-request
+    work stays small; ``score`` receives the batch's rows as one list. Each
+    request's rows stay contiguous and in order.
+    """
+
+    def __init__(
+        self,
+        score=score_employees,
+        max_batch_rows=SCORING_MAX_BATCH_ROWS,
+        max_wait=SCORING_MAX_WAIT_MS / 1000,
+    ):
+        self.score = score
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait
+        self._batch_sizes = Counter()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, rows):
+        """Score ``rows`` in the next batch; returns a Future of probabilities"""
+        future = Future()
+        self._queue.put((rows, future))
+        return future
+
+    def batch_sizes(self):
+        """Number of batches scored, by batch size in rows"""
+        with self._lock:
+            return Counter(self._batch_sizes)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        rows = len(batch[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while rows < self.max_batch_rows:
+            try:
+                timeout = deadline - time.monotonic()
+                item = (
+                    self._queue.get(timeout=timeout)
+                    if timeout > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            requests = [rows for rows, _ in batch]
+            try:
+                probs = self.score([row for rows in requests for row in rows])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            with self._lock:
+                self._batch_sizes[len(probs)] += 1
+            offsets = np.cumsum([0] + [len(rows) for rows in requests])
+            for (_, future), start, stop in zip(batch, offsets, offsets[1:]):
+                future.set_result(probs[start:stop])
+
+
+class ServiceMetrics:
+    def __init__(self):
+        self.latencies = {}
+        self.requests = Counter()
+        self.errors = Counter()
+        self.lock = threading.Lock()
+
+    def record(self, endpoint, seconds, error=False):
+        with self.lock:
+            self.requests[endpoint] += 1
+            self.errors[endpoint] += error
+            self.latencies.setdefault(endpoint, deque(maxlen=LATENCY_WINDOW)).append(
+                seconds
+            )
+
+    def snapshot(self, batch_sizes):
+        with self.lock:
+            latency = {
+                endpoint: {
+                    "p50_ms": float(np.percentile(values, 50) * 1000),
+                    "p99_ms": float(np.percentile(values, 99) * 1000),
+                }
+                for endpoint, values in self.latencies.items()
+                if values
+            }
+            requests, errors = dict(self.requests), dict(self.errors)
+        # Batch sizes bucketed by powers of two: "1", "2-3", "4-7", ...
+        histogram = Counter()
+        for size, count in batch_sizes.items():
+            low = 1 << (size.bit_length() - 1)
+            histogram[str(low) if low == 1 else f"{low}-{2 * low - 1}"] += count
+        return {
+            "requests": requests,
+            "errors": errors,
+            "latency": latency,
+            "batch_sizes": dict(
+                sorted(histogram.items(), key=lambda item: int(item[0].split("-")[0]))
+            ),
+            "batches": sum(batch_sizes.values()),
+        }
+
+
+def score_results(records, probs):
+    labels, _ = assign_risk_bands(probs)
+    results = []
+    for record, prob, label in zip(records, probs, labels):
+        result = {"Attrition_Probability": float(prob), "Risk_Label": str(label)}
+        if ID_COLUMN in record:
+            result[ID_COLUMN] = record[ID_COLUMN]
+        results.append(result)
+    return results
+
+
+def make_handler(batcher, metrics):
+    class ScoringHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = self.path.rstrip("/")
+            if path == "/metrics":
+                self._send_json(200, metrics.snapshot(batcher.batch_sizes()))
+            elif path == "/health":
+                self._send_json(200, {"status": "ok"})
+            else:
+                self._send_json(404, {"error": "Not found"})
+
+        def do_POST(self):
+            start = time.perf_counter()
+            endpoint = self.path.rstrip("/")
+            if endpoint not in ("/score", "/score/bulk"):
+                self._send_json(404, {"error": "Not found"})
+                return
+
+            try:
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                records = body.get("employees") if endpoint == "/score/bulk" else [body]
+                if not isinstance(records, list) or not all(
+                    isinstance(record, dict) for record in records
+                ):
+                    raise ValueError("Expected employee objects")
+                rows = parse_employees(records)
+            except (TypeError, ValueError, AttributeError) as e:
+                status, payload = 400, {"error": str(e)}
+            else:
+                try:
+                    probs = batcher.submit(rows).result() if records else []
+                except Exception as e:
+                    status, payload = 500, {"error": f"Scoring failed: {e}"}
+                else:
+                    status, results = 200, score_results(records, probs)
+                    payload = (
+                        results[0] if endpoint == "/score" else {"results": results}
+                    )
+            self._send_json(status, payload)
+            metrics.record(endpoint, time.perf_counter() - start, error=status != 200)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ScoringHandler
+
+
+def serve(host="127.0.0.1", port=8090, max_batch_rows=None, max_wait_ms=None):
+    """Start the service on a background thread and return the server"""
+    # Load and compile the artifacts before accepting requests
+    get_compiled_scorer()
+    batcher = MicroBatcher(
+        max_batch_rows=max_batch_rows or SCORING_MAX_BATCH_ROWS,
+        max_wait=(SCORING_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms) / 1000,
+    )
+    metrics = ServiceMetrics()
+    server = ThreadingHTTPServer((host, port), make_handler(batcher, metrics))
+    server.daemon_threads = True
+    server.batcher, server.metrics = batcher, metrics
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Attrition scoring service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--max-batch-rows", type=int, default=SCORING_MAX_BATCH_ROWS)
+    parser.add_argument("--max-wait-ms", type=float, default=SCORING_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, args.max_batch_rows, args.max_wait_ms)
+    print(f"Scoring service on http://{args.host}:{args.port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,51 @@
 import os
+import sys
 from dotenv import load_dotenv
 import pandas as pd
-import streamlit as st
-from azure.storage.blob import BlobServiceClient
-import io
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+sys.path.append(os.path.dirname(__file__))
+from blob_store import open_blob
+from instrumentation import instrumented
+from preprocessing_pipeline import (
+    CATEGORICAL_FEATURES,
+    DATE_COLUMNS,
+    INPUT_COLUMNS,
+    RAW_NUMERICAL_FEATURES,
+)
 
 # Load environment variables silently
 load_dotenv(verbose=False)
 
+# The employee identifier plus every column the preprocessing pipeline uses;
+# anything else in an extract is never read
+LOAD_COLUMNS = ["EmployeeID", *INPUT_COLUMNS]
+FILE_FORMATS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+}
+# Rows per DataFrame yielded by iter_dataset
+DEFAULT_CHUNKSIZE = 50_000
+# Bytes looked at for the header line of a CSV stream
+CSV_HEADER_PEEK_BYTES = 64 * 1024
+# Declared up front so the CSV reader skips type inference for model inputs.
+# Dates stay text for FeatureEngineer to parse, so a malformed date becomes
+# NaT rather than failing a block whose type was inferred from earlier rows.
+CSV_COLUMN_TYPES = {
+    **{column: pa.float64() for column in RAW_NUMERICAL_FEATURES},
+    **{column: pa.string() for column in DATE_COLUMNS},
+    **{
+        column: pa.dictionary(pa.int32(), pa.string())
+        for column in CATEGORICAL_FEATURES
+    },
+}
+
 
 def get_azure_credentials():
     """Retrieve credentials from environment with validation"""
@@ -15,31 +53,183 @@ def get_azure_credentials():
     container = os.getenv("AZURE_CONTAINER_NAME")
 
     if not all([conn_str, container]):
-        st.error("Azure configuration incomplete - check .env file")
-        st.stop()
+        raise ValueError("Azure configuration incomplete - check .env file")
     return conn_str, container
 
 
-def load_azure_data(blob_name):
-    """Secure backend-only Azure access"""
+@instrumented("load_azure_data", rows=len)
+def load_azure_data(blob_name, file_format="csv"):
+    """Secure backend-only Azure access, parsed while it downloads"""
     conn_str, container = get_azure_credentials()
 
-    try:
-        blob_service = BlobServiceClient.from_connection_string(conn_str)
-        blob_client = blob_service.get_blob_client(container=container, blob=blob_name)
-        return blob_client.download_blob().readall()
-    except Exception as e:
-        st.error(f"Secure Azure access failed: {str(e)}")
-        st.stop()
+    # CSV is parsed from the download stream; columnar formats need random
+    # access and are read from the local copy
+    with open_blob(
+        conn_str, container, blob_name, seekable=file_format != "csv"
+    ) as source:
+        return read_dataset(source, file_format)
+
+
+def file_format_for(name, default=None):
+    """Input format of a file from its extension, else ``default``"""
+    extension = os.path.splitext(str(name).lower())[1]
+    if extension in FILE_FORMATS:
+        return FILE_FORMATS[extension]
+    if default is None:
+        raise ValueError(f"Unsupported file type: {name}")
+    return default
+
+
+def _projection(names, columns):
+    return names if columns is None else [c for c in columns if c in names]
+
+
+def _csv_header(source):
+    """Column names of a CSV, read without consuming ``source``.
+
+    Returns None when the header cannot be seen up front, e.g. a stream
+    that can neither peek nor seek.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        # input_stream decompresses .csv.gz and the like, as read_csv does
+        with pa.input_stream(os.fspath(source)) as stream:
+            head = stream.read(CSV_HEADER_PEEK_BYTES)
+    elif hasattr(source, "peek"):
+        head = source.peek(CSV_HEADER_PEEK_BYTES)
+    elif hasattr(source, "seekable") and source.seekable():
+        position = source.tell()
+        head = source.read(CSV_HEADER_PEEK_BYTES)
+        source.seek(position)
+    else:
+        return None
+    line, newline, _ = bytes(head).partition(b"\n")
+    if not newline:
+        return None
+    return pa_csv.read_csv(pa.BufferReader(line + newline)).column_names
+
+
+def _csv_convert_options(columns, source):
+    column_types = CSV_COLUMN_TYPES
+    if columns is None:
+        # Columns the model does not use are kept as text. Inferring them
+        # from the first block fails on a column that is empty there and
+        # filled later on. EmployeeID keeps its inferred numeric type.
+        names = _csv_header(source) or []
+        column_types = {
+            **{name: pa.string() for name in names if name not in LOAD_COLUMNS},
+            **CSV_COLUMN_TYPES,
+        }
+    return pa_csv.ConvertOptions(
+        column_types=column_types,
+        include_columns=columns,
+        include_missing_columns=False,
+        strings_can_be_null=True,
+    )
+
 
+def _to_frame(table):
+    # Columns are released from the Arrow table as they are converted
+    df = table.to_pandas(date_as_object=False, split_blocks=True, self_destruct=True)
+    for column in CATEGORICAL_FEATURES:
+        if column in df.columns and not isinstance(
+            df[column].dtype, pd.CategoricalDtype
+        ):
+            df[column] = df[column].astype("category")
+    return df
 
+
+@instrumented("read_dataset", rows=len)
+def read_dataset(source, file_format="csv", columns=LOAD_COLUMNS):
+    """Read a CSV, Parquet or Arrow IPC file into a DataFrame.
+
+    ``source`` is a path, a file-like object or bytes. Only ``columns`` that
+    exist in the file are read (all of them if ``columns`` is None), and
+    categorical features come back as pandas categoricals.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = pa.BufferReader(source)
+
+    if file_format == "csv":
+        table = pa_csv.read_csv(
+            source, convert_options=_csv_convert_options(columns, source)
+        )
+    elif file_format == "parquet":
+        parquet_file = pq.ParquetFile(source)
+        table = parquet_file.read(
+            columns=_projection(parquet_file.schema_arrow.names, columns)
+        )
+    elif file_format == "arrow":
+        if isinstance(source, (str, os.PathLike)):
+            source = pa.memory_map(os.fspath(source))
+        reader = pa.ipc.open_file(source)
+        table = reader.read_all()
+        table = table.select(_projection(table.column_names, columns))
+    else:
+        raise ValueError(f"Unsupported file format: {file_format}")
+    return _to_frame(table)
+
+
+def iter_dataset(
+    source, file_format="csv", chunksize=DEFAULT_CHUNKSIZE, columns=LOAD_COLUMNS
+):
+    """Yield a file as DataFrames of ``chunksize`` rows, like read_dataset.
+
+    Only one chunk's worth of record batches is held at a time, so memory
+    is bounded by ``chunksize`` rather than by the size of the file.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = pa.BufferReader(source)
+
+    if file_format == "csv":
+        batches = pa_csv.open_csv(
+            source, convert_options=_csv_convert_options(columns, source)
+        )
+    elif file_format == "parquet":
+        parquet_file = pq.ParquetFile(source)
+        batches = parquet_file.iter_batches(
+            batch_size=chunksize,
+            columns=_projection(parquet_file.schema_arrow.names, columns),
+        )
+    elif file_format == "arrow":
+        if isinstance(source, (str, os.PathLike)):
+            source = pa.memory_map(os.fspath(source))
+        reader = pa.ipc.open_file(source)
+        names = _projection(reader.schema.names, columns)
+        batches = (
+            reader.get_batch(i).select(names) for i in range(reader.num_record_batches)
+        )
+    else:
+        raise ValueError(f"Unsupported file format: {file_format}")
+
+    # Record batch sizes depend on the format, so regroup them into chunks
+    pending, rows = [], 0
+    for batch in batches:
+        pending.append(batch)
+        rows += batch.num_rows
+        while rows >= chunksize:
+            table = pa.Table.from_batches(pending)
+            rest = table.slice(chunksize)
+            yield _to_frame(table.slice(0, chunksize))
+            pending, rows = rest.to_batches(), rest.num_rows
+    if rows:
+        yield _to_frame(pa.Table.from_batches(pending))
+
+
+@instrumented("load_data", rows=len)
 def load_data():
     """User-facing data loader"""
+    import streamlit as st
+
     source = st.radio("Data Source", ["Local Upload", "Azure Storage"])
 
     if source == "Local Upload":
-        uploaded = st.file_uploader("Choose CSV", type="csv")
-        return pd.read_csv(uploaded) if uploaded else None
+        uploaded = st.file_uploader(
+            "Choose a CSV, Parquet or Arrow file",
+            type=[extension.lstrip(".") for extension in FILE_FORMATS],
+        )
+        if uploaded is None:
+            return None
+        return read_dataset(uploaded, file_format_for(uploaded.name))
 
     # Azure flow - only asks for blob name
     default_blob = os.getenv("DEFAULT_BLOB_NAME", "")
@@ -51,8 +241,14 @@ def load_data():
             return None
 
         with st.spinner("Accessing secure storage..."):
-            data = load_azure_data(blob_name)
+            try:
+                df = load_azure_data(
+                    blob_name, file_format_for(blob_name, default="csv")
+                )
+            except Exception as e:
+                st.error(f"Secure Azure access failed: {str(e)}")
+                st.stop()
             st.success("Data loaded securely!")
-            return pd.read_csv(io.BytesIO(data))
+            return df
 
     return None
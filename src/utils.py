@@ -1,6 +1,11 @@
+import bisect
 import joblib
+import numpy as np
 import os
+import pandas as pd
 import sys
+import threading
+import time
 
 # Ensure the custom transformer used in the preprocessing pipeline is
 # available when unpickling the joblib artifact. This import is not used
@@ -8,6 +13,8 @@ import sys
 # definition.
 sys.path.append(os.path.dirname(__file__))
 from preprocessing_pipeline import FeatureEngineer  # noqa: F401
+from artifact_store import load_model_artifact
+from instrumentation import instrumented
 
 # model = joblib.load("../model/employee_attrition_model.pkl")
 # preprocessor = joblib.load("../artifacts/preprocessor_pipeline.pkl")
@@ -19,18 +26,159 @@ PREPROCESSOR_PATH = os.path.join(
     os.path.dirname(__file__), "..", "artifacts", "preprocessor_pipeline.pkl"
 )
 
-model = joblib.load(MODEL_PATH)
-preprocessor = joblib.load(PREPROCESSOR_PATH)
+# Artifacts are loaded on first use and shared by every session in the
+# process, so importing this module (and showing the login page) stays cheap.
+# Their arrays are memory-mapped read-only so processes on one host share the
+# pages; set ARTIFACT_MMAP_MODE="" to read them fully into memory instead.
+# MODEL_ARTIFACT_FORMAT=arrays serves the model from its exported node arrays
+# (see artifact_store), which keeps the trees themselves out of every heap.
+ARTIFACT_MMAP_MODE = os.getenv("ARTIFACT_MMAP_MODE", "r") or None
+MODEL_ARTIFACT_FORMAT = os.getenv("MODEL_ARTIFACT_FORMAT", "pickle")
+_artifacts = {}
+_artifacts_lock = threading.Lock()
 
+# Seconds spent on each startup step, reported by startup_report()
+STARTUP_TIMINGS = {}
 
-def predict_attrition(df):
-    X = preprocessor.transform(df)
-    probs = model.predict_proba(X)[:, 1]
-    df["Attrition_Probability"] = probs
-    df["Risk_Flag"] = df["Attrition_Probability"].apply(
-        lambda x: "🔴 High Risk" if x > 0.6 else "🟢 Low Risk"
+
+def record_startup_timing(name, seconds):
+    STARTUP_TIMINGS[name] = seconds
+
+
+def _load_artifact(name, loader):
+    with _artifacts_lock:
+        if name not in _artifacts:
+            start = time.perf_counter()
+            _artifacts[name] = loader()
+            record_startup_timing(f"load_{name}", time.perf_counter() - start)
+        return _artifacts[name]
+
+
+def get_model():
+    return _load_artifact(
+        "model",
+        lambda: load_model_artifact(
+            MODEL_PATH,
+            mmap_mode=ARTIFACT_MMAP_MODE,
+            use_arrays=MODEL_ARTIFACT_FORMAT == "arrays",
+        ),
     )
-    df["Risk_Label"] = df["Attrition_Probability"].apply(
-        lambda x: "High Risk" if x > 0.6 else "Low Risk"
+
+
+def get_preprocessor():
+    return _load_artifact(
+        "preprocessor",
+        lambda: joblib.load(PREPROCESSOR_PATH, mmap_mode=ARTIFACT_MMAP_MODE),
     )
+
+
+def __getattr__(name):
+    # Keep ``utils.model`` and ``utils.preprocessor`` working, loaded lazily
+    if name == "model":
+        return get_model()
+    if name == "preprocessor":
+        return get_preprocessor()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+_warm_up_started = threading.Event()
+
+
+def warm_up_in_background(*loaders):
+    """Run the artifact loaders (plus any extra ones) once, on a daemon thread"""
+    if _warm_up_started.is_set():
+        return
+    _warm_up_started.set()
+
+    def warm_up():
+        start = time.perf_counter()
+        for loader in (get_preprocessor, get_model) + loaders:
+            try:
+                loader()
+            except Exception:
+                # Leave it to the first real use to load again and surface the error
+                continue
+        record_startup_timing("warm_up", time.perf_counter() - start)
+
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
+
+def startup_report():
+    """Startup timings in seconds, in the order they were recorded"""
+    return dict(STARTUP_TIMINGS)
+
+
+# Risk bands: a probability above a threshold moves into the next band, so
+# with the default single threshold anything above 0.6 is "High Risk".
+# Override with e.g. RISK_THRESHOLDS="0.4,0.6" for low/medium/high banding.
+DEFAULT_RISK_LABELS = {
+    1: ["Low Risk", "High Risk"],
+    2: ["Low Risk", "Medium Risk", "High Risk"],
+}
+RISK_ICONS = {"Low Risk": "🟢", "Medium Risk": "🟡", "High Risk": "🔴"}
+RISK_THRESHOLDS = [
+    float(value) for value in os.getenv("RISK_THRESHOLDS", "0.6").split(",")
+]
+if len(RISK_THRESHOLDS) not in DEFAULT_RISK_LABELS:
+    raise ValueError("RISK_THRESHOLDS takes one or two comma-separated values")
+RISK_LABELS = DEFAULT_RISK_LABELS[len(RISK_THRESHOLDS)]
+HIGH_RISK_LABEL = RISK_LABELS[-1]
+
+
+def score_probabilities(df):
+    X = get_preprocessor().transform(df)
+    return get_model().predict_proba(X)[:, 1]
+
+
+def _check_risk_bands(thresholds, labels):
+    if len(labels) != len(thresholds) + 1:
+        raise ValueError("Risk bands need exactly one more label than thresholds")
+    if list(thresholds) != sorted(thresholds):
+        raise ValueError("Risk thresholds must be in ascending order")
+
+
+def assign_risk_bands(probs, thresholds=None, labels=None):
+    """Band probabilities in one vectorized pass.
+
+    Returns ``(risk_label, risk_flag)`` as ordered categoricals sharing the
+    same codes, so each row stores a small integer instead of a string.
+    """
+    thresholds = RISK_THRESHOLDS if thresholds is None else thresholds
+    labels = RISK_LABELS if labels is None else labels
+    _check_risk_bands(thresholds, labels)
+
+    codes = np.searchsorted(thresholds, probs, side="left")
+    flags = [f"{RISK_ICONS.get(label, '⚪')} {label}" for label in labels]
+    return (
+        pd.Categorical.from_codes(codes, categories=labels, ordered=True),
+        pd.Categorical.from_codes(codes, categories=flags, ordered=True),
+    )
+
+
+def risk_label(prob, thresholds=None, labels=None):
+    """Risk band of a single probability, consistent with assign_risk_bands"""
+    thresholds = RISK_THRESHOLDS if thresholds is None else thresholds
+    labels = RISK_LABELS if labels is None else labels
+    return labels[bisect.bisect_left(thresholds, prob)]
+
+
+def is_high_risk(prob):
+    return risk_label(prob) == HIGH_RISK_LABEL
+
+
+def add_risk_columns(df, probs, thresholds=None, labels=None):
+    """Return a copy of ``df`` with the probability and risk band columns"""
+    # Shallow copy: new columns land on the copy, the caller's frame is untouched
+    df = df.copy(deep=False)
+    df["Attrition_Probability"] = probs
+    risk_labels, risk_flags = assign_risk_bands(
+        df["Attrition_Probability"].to_numpy(), thresholds, labels
+    )
+    df["Risk_Flag"] = risk_flags
+    df["Risk_Label"] = risk_labels
     return df
+
+
+@instrumented("predict_attrition", rows=len)
+def predict_attrition(df):
+    return add_risk_columns(df, score_probabilities(df))
@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.append(os.path.join(ROOT, "src"))
+sys.path.append(os.path.join(ROOT, "benchmarks"))
+
+from synthetic_data import make_employees  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def employees():
+    """A small extract in the schema of the HR exports, with missing values"""
+    return make_employees(2_000, seed=7)
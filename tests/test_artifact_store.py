@@ -0,0 +1,57 @@
+import copy
+
+import joblib
+import numpy as np
+import pytest
+
+from artifact_store import ForestArrays, export_forest, load_model_artifact
+from utils import get_model, get_preprocessor
+
+
+@pytest.fixture(scope="module")
+def model_input(employees):
+    X = get_preprocessor().transform(employees)
+    # Some rows the forest has to route down its missing-value branches
+    X[::7, 0] = np.nan
+    return X
+
+
+def test_arrays_match_the_estimator(model_input):
+    model = get_model()
+    forest = ForestArrays.from_estimator(model)
+
+    np.testing.assert_array_equal(
+        forest.predict_proba(model_input), model.predict_proba(model_input)
+    )
+    np.testing.assert_array_equal(
+        forest.apply(model_input), model.apply(model_input) + forest.roots
+    )
+
+
+def test_exported_arrays_round_trip(model_input, tmp_path):
+    model_path = tmp_path / "model.pkl"
+    joblib.dump(get_model(), model_path)
+    export_forest(model_path)
+
+    forest = load_model_artifact(model_path, use_arrays=True)
+
+    assert isinstance(forest, ForestArrays)
+    assert isinstance(forest.feature, np.memmap)
+    np.testing.assert_array_equal(
+        forest.predict_proba(model_input), get_model().predict_proba(model_input)
+    )
+
+
+def test_stale_arrays_fall_back_to_the_pickle(tmp_path):
+    model_path = tmp_path / "model.pkl"
+    joblib.dump(get_model(), model_path)
+    export_forest(model_path)
+    # A new model written over the one the arrays came from
+    retrained = copy.copy(get_model())
+    retrained.estimators_ = retrained.estimators_[:10]
+    joblib.dump(retrained, model_path)
+
+    model = load_model_artifact(model_path, use_arrays=True)
+
+    assert not isinstance(model, ForestArrays)
+    assert len(model.estimators_) == 10
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from batch_scoring import iter_scored_chunks, stream_predict_attrition
+from storage_logic import LOAD_COLUMNS
+from utils import predict_attrition
+
+
+def test_chunked_scores_match_one_shot(employees, tmp_path):
+    source = tmp_path / "employees.csv"
+    employees.to_csv(source, index=False)
+    expected = predict_attrition(employees)
+
+    chunks = list(iter_scored_chunks(source, chunksize=300))
+
+    assert [len(chunk) for chunk in chunks] == [300] * 6 + [200]
+    scored = pd.concat(chunks, ignore_index=True)
+    np.testing.assert_array_equal(scored["EmployeeID"], employees["EmployeeID"])
+    np.testing.assert_allclose(
+        scored["Attrition_Probability"], expected["Attrition_Probability"]
+    )
+    assert list(scored["Risk_Label"].astype(str)) == list(
+        expected["Risk_Label"].astype(str)
+    )
+
+
+def test_stream_writes_every_row(employees, tmp_path):
+    source, destination = tmp_path / "employees.csv", tmp_path / "scores.parquet"
+    employees.to_csv(source, index=False)
+
+    rows = stream_predict_attrition(source, destination, chunksize=700)
+
+    written = pd.read_parquet(destination)
+    assert rows == len(written) == len(employees)
+    assert written["Attrition_Probability"].between(0, 1).all()
+
+
+def test_chunks_are_read_like_the_app(employees, tmp_path):
+    source = tmp_path / "employees.parquet"
+    employees.assign(notes="free text").to_parquet(source, index=False)
+
+    (chunk,) = iter_scored_chunks(
+        str(source), chunksize=5_000, file_format="parquet", columns=LOAD_COLUMNS
+    )
+
+    assert "notes" not in chunk.columns
+    assert isinstance(chunk["department"].dtype, pd.CategoricalDtype)
+    np.testing.assert_allclose(
+        chunk["Attrition_Probability"],
+        predict_attrition(employees)["Attrition_Probability"],
+    )
@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+from blob_store import RangedBlobReader, get_blob_client, open_blob
+from blob_stub_server import serve
+
+CONTAINER = "hr"
+
+
+@pytest.fixture
+def stub(tmp_path):
+    os.makedirs(tmp_path / "blobs" / CONTAINER)
+    server = serve(str(tmp_path / "blobs"), port=0)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def put_blob(stub, name, data):
+    with open(os.path.join(stub.state.root, CONTAINER, name), "wb") as f:
+        f.write(data)
+
+
+def load(stub, name, cache_dir):
+    """Read a blob through open_blob; returns its bytes and the GETs it took"""
+    downloads = stub.state.downloads
+    with open_blob(stub.connection_string, CONTAINER, name, cache_dir=cache_dir) as f:
+        if isinstance(f, str):
+            with open(f, "rb") as cached:
+                data = cached.read()
+        else:
+            data = f.read()
+    return data, stub.state.downloads - downloads
+
+
+def test_unchanged_blob_is_served_from_the_cache(stub, tmp_path):
+    payload = os.urandom(100_000)
+    put_blob(stub, "employees.csv", payload)
+    cache_dir = str(tmp_path / "cache")
+
+    assert load(stub, "employees.csv", cache_dir) == (payload, 1)
+    assert load(stub, "employees.csv", cache_dir) == (payload, 0)
+
+    # Rewritten blobs get a new ETag
+    changed = payload + b"one more row\n"
+    put_blob(stub, "employees.csv", changed)
+    assert load(stub, "employees.csv", cache_dir) == (changed, 1)
+    assert load(stub, "employees.csv", cache_dir) == (changed, 0)
+
+
+def test_ranged_read_matches_a_full_download(stub):
+    payload = os.urandom(50_000)
+    put_blob(stub, "employees.parquet", payload)
+    client = get_blob_client(stub.connection_string, CONTAINER, "employees.parquet")
+    properties = client.get_blob_properties()
+    downloads = stub.state.downloads
+
+    with RangedBlobReader(
+        client, properties.size, properties.etag, chunk_size=4096, concurrency=3
+    ) as reader:
+        ranged = reader.read()
+
+    assert stub.state.downloads - downloads == 13
+    assert ranged == client.download_blob().readall() == payload
+
+
+def test_cache_keeps_the_most_recent_entries(stub, tmp_path, monkeypatch):
+    monkeypatch.setattr("blob_store.BLOB_CACHE_MAX_ENTRIES", 2)
+    cache_dir = str(tmp_path / "cache")
+    for number in range(4):
+        put_blob(stub, f"extract-{number}.csv", b"EmployeeID\n%d\n" % number)
+        load(stub, f"extract-{number}.csv", cache_dir)
+
+    # A data file and its ETag for each entry kept
+    assert len(os.listdir(cache_dir)) == 4
+    assert load(stub, "extract-3.csv", cache_dir)[1] == 0
+    assert load(stub, "extract-2.csv", cache_dir)[1] == 0
+    assert load(stub, "extract-0.csv", cache_dir)[1] == 1
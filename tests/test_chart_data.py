@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from chart_data import compute_engagement_chart_data
+
+
+def scored(rows=600, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            # "Finance" is a category without employees
+            "department": pd.Categorical(
+                rng.choice(["Sales", "HR"], rows), categories=["Finance", "HR", "Sales"]
+            ),
+            "engagement_score": rng.uniform(1, 5, rows).round(1),
+            "Attrition_Probability": rng.uniform(0, 1, rows),
+        }
+    )
+
+
+def test_binned_points_cover_only_occupied_cells():
+    pred_df = scored()
+
+    chart = compute_engagement_chart_data(pred_df, max_points=100, bins=10)
+
+    points = chart["points"]
+    assert chart["binned"]
+    assert (points["employees"] > 0).all()
+    assert points["employees"].sum() == len(pred_df)
+    assert set(points["department"]) == {"HR", "Sales"}
+    assert set(chart["trendlines"]["department"]) == {"HR", "Sales"}
+
+
+def test_small_frames_are_plotted_per_employee():
+    pred_df = scored(rows=50)
+
+    chart = compute_engagement_chart_data(pred_df, max_points=100)
+
+    assert not chart["binned"]
+    assert len(chart["points"]) == 50
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard_metrics import TENURE_BINS, compute_dashboard_summary
+from prediction_store import compact_predictions
+from utils import HIGH_RISK_LABEL, predict_attrition
+
+
+@pytest.fixture(scope="module")
+def pred_df(employees):
+    df = employees.copy()
+    df.loc[::50, "department"] = np.nan
+    df.loc[1::40, "engagement_score"] = np.nan
+    df.loc[2::60, "tenure"] = np.nan
+    return compact_predictions(predict_attrition(df))
+
+
+@pytest.fixture(scope="module")
+def summary(pred_df):
+    return compute_dashboard_summary(pred_df)
+
+
+def test_kpis(pred_df, summary):
+    kpis = summary["kpis"]
+
+    assert kpis["total_employees"] == len(pred_df)
+    assert kpis["at_risk_employees"] == (pred_df["Risk_Label"] == HIGH_RISK_LABEL).sum()
+    assert kpis["avg_risk"] == pytest.approx(pred_df["Attrition_Probability"].mean())
+    assert kpis["avg_engagement"] == pytest.approx(pred_df["engagement_score"].mean())
+
+
+def test_department_rollup(pred_df, summary):
+    expected = (
+        pred_df.groupby("department", observed=True)
+        .agg(
+            employees=("EmployeeID", "count"),
+            Attrition_Probability=("Attrition_Probability", "mean"),
+            engagement_score=("engagement_score", "mean"),
+        )
+        .sort_values("Attrition_Probability", ascending=False)
+        .reset_index()
+    )
+    department = summary["department"]
+
+    assert department["department"].notna().all()
+    pd.testing.assert_frame_equal(
+        department.astype({"department": str}),
+        expected.astype({"department": str}),
+        check_dtype=False,
+    )
+
+
+def test_risk_counts(pred_df, summary):
+    counts = summary["risk_counts"].set_index("Risk_Label")["count"]
+
+    expected = pred_df["Risk_Label"].value_counts()
+    assert counts.to_dict() == expected.to_dict()
+
+
+def test_tenure_rollup(pred_df, summary):
+    bands = pd.cut(pred_df["tenure"], bins=TENURE_BINS)
+    expected = pred_df.groupby(bands, observed=True)["Attrition_Probability"].mean()
+
+    assert list(summary["tenure"]["tenure"]) == list(expected.index.astype(str))
+    np.testing.assert_allclose(
+        summary["tenure"]["Attrition_Probability"], expected.to_numpy()
+    )
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from explorer import ExplorerIndex
+from prediction_store import compact_predictions
+from utils import predict_attrition
+
+
+@pytest.fixture(scope="module")
+def index(employees):
+    return ExplorerIndex(compact_predictions(predict_attrition(employees)))
+
+
+def test_filters_sort_and_page(index):
+    page = index.query(
+        departments=["Sales", "HR"],
+        probability_range=(0.2, 0.8),
+        sort_by="salary",
+        ascending=True,
+        page=1,
+        page_size=25,
+    )
+
+    df = index.df
+    matching = df[
+        df["department"].isin(["Sales", "HR"])
+        & df["Attrition_Probability"].between(0.2, 0.8)
+    ]
+    expected = matching.sort_values("salary", kind="stable", na_position="last")
+    assert page.total == len(matching)
+    assert page.first_row == 26
+    assert list(page.rows["EmployeeID"]) == list(expected["EmployeeID"][25:50])
+
+
+def test_page_is_clamped_to_the_last(index):
+    page = index.query(risk_labels=["High Risk"], page=10_000, page_size=100)
+
+    assert page.page == page.pages - 1
+    assert 0 < len(page.rows) <= 100
+    assert (page.rows["Risk_Label"] == "High Risk").all()
+    probs = page.rows["Attrition_Probability"].to_numpy()
+    assert (np.diff(probs) <= 0).all()
+
+
+def test_no_match_is_one_empty_page(index):
+    page = index.query(probability_range=(2.0, 3.0))
+
+    assert (page.total, page.pages, page.first_row, len(page.rows)) == (0, 1, 0, 0)
+
+
+def test_lookup_by_id(index):
+    assert index.ids.dtype == np.int16
+
+    assert index.lookup(1042)["EmployeeID"] == 1042
+    assert index.lookup("1042")["EmployeeID"] == 1042
+    # Absent, malformed and out of the compacted dtype's range
+    for employee_id in (5, "abc", 40000, 99999999999999999999):
+        assert index.lookup(employee_id) is None
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fast_inference import CompiledScorer, fast_score_probabilities
+from utils import get_model, get_preprocessor, score_probabilities
+
+
+@pytest.fixture(scope="module")
+def scorer():
+    return CompiledScorer(get_preprocessor(), get_model())
+
+
+@pytest.fixture(scope="module")
+def awkward(employees):
+    """Rows with missing numbers and dates and an unseen department"""
+    df = employees.head(300).copy()
+    df.loc[::5, "salary"] = np.nan
+    df.loc[1::5, "hire_date"] = None
+    df.loc[2::5, "last_promotion_date"] = None
+    df.loc[3::5, "department"] = "Unseen"
+    df.loc[4::5, "department"] = np.nan
+    return df
+
+
+def test_compiled_scores_match_sklearn(scorer, awkward):
+    np.testing.assert_array_equal(
+        scorer.transform(awkward), get_preprocessor().transform(awkward)
+    )
+    np.testing.assert_array_equal(scorer.score(awkward), score_probabilities(awkward))
+
+
+def test_parsed_dates_and_column_dicts_score_the_same(scorer, awkward):
+    parsed = awkward.assign(
+        hire_date=pd.to_datetime(awkward["hire_date"]),
+        last_promotion_date=pd.to_datetime(awkward["last_promotion_date"]),
+    )
+    columns = {column: awkward[column].to_numpy() for column in awkward.columns}
+
+    expected = score_probabilities(awkward)
+    np.testing.assert_array_equal(scorer.score(parsed), expected)
+    np.testing.assert_array_equal(scorer.score(columns), expected)
+
+
+def test_fast_path_agrees_on_both_sides_of_the_cutoff(employees, monkeypatch):
+    monkeypatch.setattr("fast_inference.FAST_PATH_MAX_ROWS", 10)
+
+    np.testing.assert_array_equal(
+        fast_score_probabilities(employees.head(10)),
+        score_probabilities(employees.head(10)),
+    )
+    np.testing.assert_array_equal(
+        fast_score_probabilities(employees.head(50)),
+        score_probabilities(employees.head(50)),
+    )
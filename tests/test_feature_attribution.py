@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from artifact_store import ForestArrays
+from feature_attribution import ForestExplainer
+from prediction_store import compact_predictions
+from utils import get_model, get_preprocessor, predict_attrition
+
+
+@pytest.fixture(scope="module")
+def explainer():
+    return ForestExplainer(get_preprocessor(), get_model())
+
+
+@pytest.fixture(scope="module")
+def attributions(explainer, employees):
+    return explainer.explain(compact_predictions(predict_attrition(employees)))
+
+
+def test_contributions_add_up_to_the_probability(attributions):
+    totals = attributions.bias + attributions.contributions.sum(axis=1)
+
+    np.testing.assert_allclose(
+        totals, attributions.frame["Attrition_Probability"], atol=1e-6
+    )
+
+
+def test_array_forest_attributes_the_same(explainer, employees):
+    arrays = ForestExplainer(
+        get_preprocessor(), ForestArrays.from_estimator(get_model())
+    )
+    X = get_preprocessor().transform(employees)
+
+    assert arrays.bias == explainer.bias
+    np.testing.assert_array_equal(arrays.contributions(X), explainer.contributions(X))
+
+
+def test_drivers_are_the_largest_contributions(attributions):
+    drivers = attributions.drivers(1042, count=3)
+
+    row = attributions.contributions[attributions.position(1042)]
+    assert [driver["contribution"] for driver in drivers] == sorted(
+        row.tolist(), key=abs, reverse=True
+    )[:3]
+    assert {driver["feature"] for driver in drivers} <= set(attributions.features)
+
+
+def test_unknown_ids_have_no_drivers(attributions):
+    assert attributions.ids.dtype == np.int16
+
+    for employee_id in (5, "abc", 40000, 99999999999999999999):
+        assert attributions.drivers(employee_id) == []
@@ -0,0 +1,83 @@
+import json
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from incremental_scoring import incremental_predict_attrition
+from utils import get_preprocessor, predict_attrition
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / "scores.parquet")
+
+
+def assert_same_as_full_score(result, df):
+    pd.testing.assert_frame_equal(result, predict_attrition(df))
+
+
+def backdate(store_path, days):
+    """Mark the stored scores as computed ``days`` before today"""
+    table = pq.read_table(store_path)
+    meta = json.loads(table.schema.metadata[b"scoring"])
+    scored_on = pd.Timestamp("today") - pd.Timedelta(days=days)
+    meta["scored_on"] = scored_on.strftime("%Y-%m-%d")
+    pq.write_table(
+        table.replace_schema_metadata({"scoring": json.dumps(meta)}), store_path
+    )
+
+
+def test_unchanged_rows_are_not_rescored(employees, store_path):
+    first = incremental_predict_attrition(employees, store_path)
+    again = incremental_predict_attrition(employees, store_path)
+
+    assert first.attrs["rescored_rows"] == len(employees)
+    assert again.attrs["rescored_rows"] == 0
+    assert_same_as_full_score(again, employees)
+
+
+def test_edited_rows(employees, store_path):
+    incremental_predict_attrition(employees, store_path)
+    edited = employees.copy()
+    edited.loc[:9, "overtime_hours"] += 5
+    edited.loc[10:19, "department"] = "Sales"
+
+    result = incremental_predict_attrition(edited, store_path)
+
+    assert result.attrs["rescored_rows"] <= 20
+    assert_same_as_full_score(result, edited)
+
+
+def test_next_day_drift(employees, store_path, monkeypatch):
+    engineer = get_preprocessor().named_steps["feature_engineering"]
+    yesterday = pd.Timestamp("today").normalize() - pd.Timedelta(days=1)
+    monkeypatch.setattr(engineer, "reference_date", yesterday)
+    incremental_predict_attrition(employees, store_path)
+    backdate(store_path, days=1)
+    monkeypatch.setattr(engineer, "reference_date", None)
+
+    result = incremental_predict_attrition(employees, store_path)
+
+    assert 0 < result.attrs["rescored_rows"] < len(employees)
+    assert_same_as_full_score(result, employees)
+
+
+def test_reordered_rows(employees, store_path):
+    incremental_predict_attrition(employees, store_path)
+    shuffled = employees.sample(frac=1, random_state=0)
+
+    result = incremental_predict_attrition(shuffled, store_path)
+
+    assert result.attrs["rescored_rows"] == 0
+    assert_same_as_full_score(result, shuffled)
+
+
+def test_duplicate_ids_fall_back_to_a_full_score(employees, store_path):
+    incremental_predict_attrition(employees, store_path)
+    duplicated = pd.concat([employees, employees.head(5)], ignore_index=True)
+
+    result = incremental_predict_attrition(duplicated, store_path)
+
+    assert result.attrs["rescored_rows"] == len(duplicated)
+    assert_same_as_full_score(result, duplicated)
@@ -0,0 +1,66 @@
+import pytest
+
+from llm import IncrementalSectionParser, parse_insights
+from llm_stub_server import STUB_COMPLETION
+
+EXPECTED = {
+    "diagnostic": (
+        "**Engagement Score** and **Job Satisfaction** are the main retention"
+        " factors for this employee."
+    ),
+    "prescriptive": (
+        "- Schedule a career conversation within two weeks\n"
+        "- Review **Overtime Hours** with the line manager\n"
+        "- Offer a training or certification budget"
+    ),
+    "preventive": "Run quarterly stay interviews for employees with similar profiles.",
+}
+
+
+def test_markdown_headers():
+    assert parse_insights(STUB_COMPLETION) == EXPECTED
+
+
+def test_bold_headers():
+    bold = STUB_COMPLETION.replace("### ", "**").replace("\n", "**\n", 1)
+    assert parse_insights(bold)["diagnostic"] == EXPECTED["diagnostic"]
+
+
+def test_plain_text_headers():
+    text = (
+        "Diagnostic Insight: Engagement is low.\n"
+        "Prescriptive Actions:\n- Meet monthly\n"
+        "3. Preventive Strategy\nStay interviews."
+    )
+
+    assert parse_insights(text) == {
+        "diagnostic": "Engagement is low.",
+        "prescriptive": "- Meet monthly",
+        "preventive": "Stay interviews.",
+    }
+
+
+def test_prose_mentioning_a_title_is_not_a_header():
+    insights = parse_insights("The diagnostic insight is that engagement is low.")
+
+    assert all(text.startswith("⚠️") for text in insights.values())
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 50])
+def test_streamed_deltas_match_one_shot(size):
+    parser = IncrementalSectionParser()
+    for start in range(0, len(STUB_COMPLETION), size):
+        parser.feed(STUB_COMPLETION[start : start + size])
+        snapshot = parser.snapshot()
+        # A partial header never leaks into the section before it
+        assert "Prescriptive" not in snapshot["diagnostic"]
+        assert "Preventive" not in snapshot["prescriptive"]
+
+    assert parser.finish() == EXPECTED
+
+
+def test_missing_sections_are_marked_failed():
+    insights = parse_insights("### Diagnostic Insight\nOnly this.")
+
+    assert insights["diagnostic"] == "Only this."
+    assert insights["preventive"].startswith("⚠️ Insight generation failed")
@@ -0,0 +1,48 @@
+import pandas as pd
+
+from llm import PROFILE_FIELDS, SYSTEM_PROMPT, build_prompt, estimate_tokens
+from utils import predict_attrition
+
+
+def scored_row(employees, **values):
+    return predict_attrition(employees.head(1)).assign(**values).iloc[0]
+
+
+def test_prompt_holds_only_profile_fields(employees):
+    row = scored_row(employees, manager_notes="Relocating soon")
+
+    prompt = build_prompt(row, token_budget=10_000)
+
+    assert "EmployeeID" not in prompt and "Relocating" not in prompt
+    assert all(f"{field}=" in prompt for field in PROFILE_FIELDS)
+
+
+def test_missing_values_of_nullable_dtypes(employees):
+    df = predict_attrition(employees.head(2)).astype(
+        {
+            "tenure": "Int64",
+            "department": "string[pyarrow]",
+            "hire_date": "string",
+        }
+    )
+    df.loc[0, ["tenure", "department", "hire_date", "salary"]] = pd.NA
+    row = df.iloc[0]
+    drivers = [{"feature": "tenure", "value": row["tenure"], "contribution": 0.05}]
+
+    prompt = build_prompt(row, drivers, token_budget=10_000)
+
+    for field in ("tenure", "department", "hire_date", "salary"):
+        assert f"{field}=n/a" in prompt
+    assert "tenure=n/a (+5.0 pts)" in prompt
+
+
+def test_budget_drops_the_least_important_fields_first(employees):
+    row = scored_row(employees)
+    drivers = [{"feature": "hire_date", "value": None, "contribution": -0.02}]
+    budget = estimate_tokens(SYSTEM_PROMPT) + 60
+
+    prompt = build_prompt(row, drivers, token_budget=budget)
+
+    assert estimate_tokens(prompt) <= 60
+    assert "department=" in prompt and "hire_date=" in prompt
+    assert "distance_from_home=" not in prompt
@@ -0,0 +1,56 @@
+import pandas as pd
+
+from prediction_cache import PredictionCache, dataset_fingerprint, prediction_key
+
+
+def frame(values):
+    return pd.DataFrame({"EmployeeID": [1, 2, 3], "salary": values})
+
+
+def test_keys_follow_content():
+    df = frame([1.0, 2.0, 3.0])
+
+    assert prediction_key(df) == prediction_key(df.copy())
+    assert prediction_key(df) != prediction_key(frame([1.0, 2.0, 4.0]))
+    # Same values in another dtype are a different dataset
+    assert dataset_fingerprint(df) != dataset_fingerprint(
+        df.astype({"salary": "float32"})
+    )
+
+
+def test_lru_evicts_least_recently_used():
+    cache = PredictionCache(max_entries=2)
+    cache.put("a", {"rows": 1})
+    cache.put("b", {"rows": 2})
+    cache.get("a")
+    cache.put("c", {"rows": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"rows": 1}
+    assert cache.get("c") == {"rows": 3}
+
+
+def test_evicted_frames_stay_shared_while_referenced():
+    cache = PredictionCache(max_entries=1)
+    held = frame([1.0, 2.0, 3.0])
+    cache.put("a", held)
+    cache.put("b", frame([4.0, 5.0, 6.0]))
+
+    assert cache.get("a") is held
+
+
+def test_byte_budget_keeps_newest_entry():
+    cache = PredictionCache(max_entries=8, max_bytes=1)
+    cache.put("a", frame([1.0, 2.0, 3.0]))
+    newest = frame([4.0, 5.0, 6.0])
+    cache.put("b", newest)
+
+    assert cache.get("b") is newest
+
+
+def test_disk_tier_survives_a_new_cache(tmp_path):
+    PredictionCache(directory=tmp_path).put("a", frame([1.0, 2.0, 3.0]))
+
+    restored = PredictionCache(directory=tmp_path).get("a")
+
+    pd.testing.assert_frame_equal(restored, frame([1.0, 2.0, 3.0]))
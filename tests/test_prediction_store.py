@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from prediction_store import (
+    SessionPredictions,
+    compact_predictions,
+    session_memory_report,
+    session_predictions,
+)
+from utils import HIGH_RISK_LABEL, predict_attrition
+
+
+@pytest.fixture(scope="module")
+def pred_df(employees):
+    return compact_predictions(predict_attrition(employees))
+
+
+def test_at_risk_rows(pred_df):
+    predictions = SessionPredictions(pred_df)
+
+    expected = pred_df[pred_df["Risk_Label"] == HIGH_RISK_LABEL]
+    assert predictions.at_risk_rows.dtype == np.int32
+    assert predictions.at_risk_count == len(expected) > 0
+    pd.testing.assert_frame_equal(predictions.at_risk, expected)
+    assert session_predictions(pred_df, predictions) is predictions
+    assert session_predictions(pred_df.copy(), predictions) is not predictions
+
+
+def test_memory_report_counts_shared_predictions_once(pred_df):
+    predictions = SessionPredictions(pred_df)
+    state = {
+        "predictions": predictions,
+        "upload": pred_df.head(100).copy(),
+        "insights": {"1042": "x" * 1_000},
+    }
+
+    report = session_memory_report(state, budget_mb=0.001)
+
+    shared_mb = pred_df.memory_usage(deep=True).sum() / 1024**2
+    assert report["shared_mb"] == round(shared_mb, 2)
+    # The handle itself only holds row positions
+    assert report["largest"]["predictions"] < shared_mb / 10
+    assert list(report["largest"]) == ["upload", "insights", "predictions"]
+    assert report["over_budget"]
+    assert not session_memory_report(state, budget_mb=64)["over_budget"]
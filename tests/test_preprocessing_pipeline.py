@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from preprocessing_pipeline import DATE_COLUMNS, FeatureEngineer
+
+REFERENCE_DATE = "2025-06-30"
+
+
+@pytest.fixture
+def engineer():
+    return FeatureEngineer(reference_date=REFERENCE_DATE)
+
+
+def test_matches_row_by_row_parsing(engineer, employees):
+    result = engineer.transform(employees)
+
+    reference = pd.Timestamp(REFERENCE_DATE)
+    for column, feature in zip(
+        DATE_COLUMNS, ("employment_age", "years_since_last_promotion")
+    ):
+        days = (reference - pd.to_datetime(employees[column])).dt.days
+        np.testing.assert_array_equal(result[feature], days / 365)
+    assert not set(DATE_COLUMNS) & set(result.columns)
+
+
+def test_duplicated_index_and_leading_gaps(engineer, employees):
+    # As concatenated uploads are: the index restarts with every part
+    df = pd.concat([employees.head(5), employees.head(5)])
+    df.iloc[:2, df.columns.get_indexer(DATE_COLUMNS)] = None
+    df = df.assign(hire_date=df["hire_date"].str.replace("-", "/"))
+
+    assert engineer._date_format_for(df["hire_date"]) == "%Y/%m/%d"
+    result = engineer.transform(df)
+
+    expected = engineer.transform(df.reset_index(drop=True))
+    np.testing.assert_array_equal(result["employment_age"], expected["employment_age"])
+    assert result["employment_age"].iloc[2:].notna().all()
+    assert (
+        result["years_since_last_promotion"].isna().sum()
+        == 2 + df["last_promotion_date"].iloc[2:].isna().sum()
+    )
+
+
+def test_all_missing_dates(engineer, employees):
+    df = employees.head(3).assign(hire_date=None, last_promotion_date=None)
+
+    assert engineer.transform(df)["employment_age"].isna().all()
@@ -0,0 +1,57 @@
+import gzip
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from prediction_store import compact_predictions
+from report_export import REPORT_FORMATS, build_report
+from utils import predict_attrition
+
+
+@pytest.fixture(scope="module")
+def frame(employees):
+    return compact_predictions(predict_attrition(employees.head(500)))
+
+
+def read_report(report, report_format):
+    if report_format == "Compressed CSV":
+        return pd.read_csv(io.BytesIO(gzip.decompress(report.read())))
+    if report_format == "Parquet":
+        return pd.read_parquet(report)
+    return pd.read_excel(report, sheet_name=None)
+
+
+def as_text(df):
+    """``df`` as its CSV reads back, the common ground of the three formats"""
+    return pd.read_csv(io.StringIO(df.to_csv(index=False)))
+
+
+@pytest.mark.parametrize("report_format", list(REPORT_FORMATS))
+@pytest.mark.parametrize("chunk_rows", [None, 64])
+def test_report_round_trips(frame, report_format, chunk_rows):
+    rows = np.flatnonzero((frame["Attrition_Probability"] > 0.4).to_numpy())
+    expected = frame.iloc[rows].reset_index(drop=True)
+
+    with build_report(frame, report_format, rows, chunk_rows) as report:
+        result = read_report(report, report_format)
+
+    if report_format == "Parquet":
+        pd.testing.assert_frame_equal(result, expected)
+    elif report_format == "Excel":
+        (sheet,) = result.values()
+        pd.testing.assert_frame_equal(sheet, as_text(expected), check_dtype=False)
+    else:
+        pd.testing.assert_frame_equal(result, as_text(expected))
+
+
+@pytest.mark.parametrize("report_format", list(REPORT_FORMATS))
+def test_empty_report_keeps_the_header(frame, report_format):
+    with build_report(frame, report_format, rows=[]) as report:
+        result = read_report(report, report_format)
+
+    if report_format == "Excel":
+        (result,) = result.values()
+    assert len(result) == 0
+    assert list(result.columns) == list(frame.columns)
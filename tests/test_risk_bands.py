@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import add_risk_columns, assign_risk_bands, risk_label
+
+
+def test_bands_match_scalar_labels():
+    probs = np.array([0.0, 0.39, 0.4, 0.41, 0.6, 0.61, 1.0])
+    thresholds, labels = [0.4, 0.6], ["Low Risk", "Medium Risk", "High Risk"]
+
+    risk_labels, risk_flags = assign_risk_bands(probs, thresholds, labels)
+
+    assert list(risk_labels) == [risk_label(p, thresholds, labels) for p in probs]
+    # A probability equal to a threshold stays in the lower band
+    assert list(risk_labels[[2, 4]]) == ["Low Risk", "Medium Risk"]
+    assert (risk_flags.codes == risk_labels.codes).all()
+    assert risk_flags[-1] == "🔴 High Risk"
+
+
+def test_invalid_bands_are_rejected():
+    with pytest.raises(ValueError):
+        assign_risk_bands(np.array([0.5]), [0.6, 0.4], ["a", "b", "c"])
+    with pytest.raises(ValueError):
+        assign_risk_bands(np.array([0.5]), [0.6], ["a", "b", "c"])
+
+
+def test_add_risk_columns_leaves_input_untouched():
+    df = pd.DataFrame({"EmployeeID": [1, 2]})
+
+    scored = add_risk_columns(df, np.array([0.2, 0.9]), [0.6], ["Low", "High"])
+
+    assert list(df.columns) == ["EmployeeID"]
+    assert list(scored["Risk_Label"]) == ["Low", "High"]
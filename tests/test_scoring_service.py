@@ -0,0 +1,99 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scoring_service import (
+    MicroBatcher,
+    employees_frame,
+    parse_employees,
+    score_employees,
+    score_results,
+)
+from utils import score_probabilities
+
+
+@pytest.fixture
+def records(employees):
+    rows = employees.head(3).astype(object)
+    return rows.where(rows.notna(), None).to_dict("records")
+
+
+def test_dates_are_parsed_per_request(records):
+    iso = employees_frame(records[:1])
+    compact = employees_frame(
+        [
+            {
+                **records[1],
+                "hire_date": records[1]["hire_date"].replace("-", ""),
+                "last_promotion_date": None,
+            }
+        ]
+    )
+
+    assert compact["hire_date"].dtype == "datetime64[ns]"
+    assert compact["hire_date"].iloc[0] == pd.Timestamp(records[1]["hire_date"])
+    assert compact["last_promotion_date"].isna().all()
+    assert iso["hire_date"].dtype == compact["hire_date"].dtype
+
+
+def test_non_iso_dates_are_rejected(records):
+    with pytest.raises(ValueError, match="hire_date"):
+        employees_frame([{**records[0], "hire_date": "04/09/2016"}])
+
+
+def test_row_scores_the_same_alone_and_batched(records):
+    first = parse_employees(records[:1])
+    later = parse_employees(
+        [
+            {**record, "hire_date": record["hire_date"] + "T09:30:00"}
+            for record in records[1:]
+        ]
+    )
+    started, release = threading.Event(), threading.Event()
+    batches = []
+
+    def score(rows):
+        started.set()
+        release.wait(5)
+        batches.append(len(rows))
+        return score_employees(rows)
+
+    batcher = MicroBatcher(score=score)
+    busy = batcher.submit(parse_employees(records[2:]))
+    started.wait(5)
+    # Both queue up while the batcher is busy and are scored as one batch
+    batched = [batcher.submit(first), batcher.submit(later)]
+    release.set()
+    busy.result(5)
+    batched_first, batched_later = (future.result(5) for future in batched)
+
+    assert batches == [1, 3]
+    np.testing.assert_array_equal(batched_first, score_employees(first))
+    np.testing.assert_array_equal(batched_later, score_employees(later))
+
+
+def test_compiled_and_pipeline_batches_agree(records, monkeypatch):
+    rows = parse_employees(records * 4)
+    compiled = score_employees(rows)
+    monkeypatch.setattr("scoring_service.FAST_PATH_MAX_ROWS", 0)
+
+    np.testing.assert_array_equal(score_employees(rows), compiled)
+    np.testing.assert_array_equal(
+        compiled, score_probabilities(employees_frame(records * 4))
+    )
+
+
+def test_fields_of_the_wrong_type_are_rejected(records):
+    for field, value in (("salary", "high"), ("tenure", [3]), ("department", {})):
+        with pytest.raises(ValueError, match=field):
+            parse_employees([{**records[0], field: value}])
+
+
+def test_results_carry_ids_and_bands():
+    results = score_results([{"EmployeeID": 7}, {}], np.array([0.9, 0.1]))
+
+    assert results[0]["EmployeeID"] == 7
+    assert "EmployeeID" not in results[1]
+    assert [result["Risk_Label"] for result in results] == ["High Risk", "Low Risk"]
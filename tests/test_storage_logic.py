@@ -0,0 +1,60 @@
+import io
+
+import pandas as pd
+import pytest
+
+from storage_logic import iter_dataset, read_dataset
+from synthetic_data import make_employees
+
+
+@pytest.fixture(scope="module")
+def late_column_csv(tmp_path_factory):
+    """An extract whose extra column is empty until well past the first block"""
+    df = make_employees(30_000, seed=3)
+    df["note"] = None
+    df.loc[25_000:, "note"] = "note"
+    path = tmp_path_factory.mktemp("extract") / "employees.csv"
+    df.to_csv(path, index=False)
+    return path
+
+
+def sources(path):
+    data = path.read_bytes()
+    return {
+        "path": str(path),
+        "bytes": data,
+        "seekable": io.BytesIO(data),
+        "stream": io.BufferedReader(io.BytesIO(data)),
+    }
+
+
+@pytest.mark.parametrize("kind", ["path", "bytes", "seekable", "stream"])
+def test_all_columns_keep_late_text_columns(late_column_csv, kind):
+    chunks = list(
+        iter_dataset(sources(late_column_csv)[kind], chunksize=10_000, columns=None)
+    )
+
+    df = pd.concat(chunks, ignore_index=True)
+    assert len(df) == 30_000
+    assert df["note"].isna().sum() == 25_000
+    assert (df["note"].dropna() == "note").all()
+    assert pd.api.types.is_integer_dtype(df["EmployeeID"])
+
+
+def test_read_dataset_all_columns(late_column_csv):
+    df = read_dataset(str(late_column_csv), columns=None)
+
+    assert df["note"].iloc[-1] == "note"
+    assert isinstance(df["department"].dtype, pd.CategoricalDtype)
+
+
+def test_chunks_match_one_read(employees, tmp_path):
+    path = tmp_path / "employees.parquet"
+    employees.to_parquet(path, index=False)
+
+    chunks = list(iter_dataset(str(path), "parquet", chunksize=600))
+
+    assert [len(chunk) for chunk in chunks] == [600, 600, 600, 200]
+    pd.testing.assert_frame_equal(
+        pd.concat(chunks, ignore_index=True), read_dataset(str(path), "parquet")
+    )